@@ -0,0 +1,374 @@
+"""Маршрутизация сигнализации: подключения, комнаты и исходящие очереди
+
+Модуль не зависит от веб-приложения и полностью аннотирован, поэтому
+его можно скомпилировать mypyc (см. README) без изменений в логике.
+"""
+import asyncio
+import time
+import uuid
+import logging
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Set, cast
+
+import orjson
+from fastapi import WebSocket
+
+logger = logging.getLogger(__name__)
+
+# Параметры исходящей очереди сигнализации
+OUTBOX_SIZE = 1024            # максимум сообщений в очереди одного клиента
+MAX_BATCH = 128               # максимум сообщений в одном WebSocket фрейме
+MAX_BATCH_BYTES = 64 * 1024   # максимальный размер пачки в байтах
+SEND_TIMEOUT = 2.0            # сколько секунд ждать медленного получателя
+COALESCE_WINDOW = 0.005       # сколько секунд добирать сообщения во время всплеска
+
+# Начало сериализованного одиночного ICE кандидата: такие сообщения можно
+# выбрасывать при переполнении очереди, кандидаты избыточны по своей природе.
+# Запятая после типа отсекает пачки ice_candidates - в пачке могут быть
+# все кандидаты участника, и ее потеря оборвет соединение
+ICE_PREFIX = b'{"type":"ice_candidate",'
+
+class Client:
+    """Одно подключение: сокет, комнаты клиента и его исходящая очередь"""
+    __slots__ = ("client_id", "ws", "send", "rooms", "outbox", "writer", "alive")
+    
+    def __init__(self, client_id: str, ws: WebSocket) -> None:
+        self.client_id: str = client_id
+        self.ws: WebSocket = ws
+        # Привязанный ws.send: фреймы уходят ASGI сообщением без обертки send_bytes
+        self.send: Callable[[Dict[str, Any]], Awaitable[None]] = ws.send
+        # Обратный индекс: в каких комнатах состоит клиент
+        self.rooms: Set[str] = set()
+        self.outbox: asyncio.Queue = asyncio.Queue(maxsize=OUTBOX_SIZE)
+        self.writer: Optional[asyncio.Task] = None
+        self.alive: bool = True
+
+class ConnectionManager:
+    def __init__(self) -> None:
+        # Все данные подключения в одном объекте - один поиск на операцию
+        self.clients: Dict[str, Client] = {}
+        self.rooms: Dict[str, Set[str]] = {}
+        self.user_info: Dict[str, dict] = {}
+        # Публичная запись участника (то, что видят другие) создается один раз при входе
+        self.public_info: Dict[str, dict] = {}
+        # Шина между воркерами и ее фоновые задачи
+        self.backplane: Optional["RedisBackplane"] = None
+        self._background: Set[asyncio.Task] = set()
+    
+    async def connect(self, websocket: WebSocket, client_id: str) -> bool:
+        # ID уже занят живым подключением: замена оставила бы старого писателя
+        # и сокет без присмотра, а выход старого цикла снял бы нового клиента
+        if client_id in self.clients:
+            logger.warning("🚫 ID %s уже подключен, отклоняем повторное подключение", client_id)
+            await websocket.close(code=1008)
+            return False
+        
+        # Объект клиента и очередь готовим до accept: после рукопожатия
+        # остается только регистрация. Откладывать ее (call_soon) нельзя -
+        # первое сообщение может быть обработано раньше отложенного вызова
+        client = Client(client_id, websocket)
+        await websocket.accept()
+        # Пока шло рукопожатие, этот же ID мог успеть зарегистрироваться
+        if client_id in self.clients:
+            await self._close_quietly(websocket, code=1008)
+            return False
+        client.writer = asyncio.create_task(self._writer(client))
+        self.clients[client_id] = client
+        logger.debug("✅ Подключился: %s", client_id)
+        return True
+    
+    def disconnect(self, client_id: str) -> None:
+        client = self.clients.pop(client_id, None)
+        if client is None:
+            self.user_info.pop(client_id, None)
+            self.public_info.pop(client_id, None)
+            return
+        
+        # Останавливаем писателя
+        client.alive = False
+        if client.writer:
+            client.writer.cancel()
+        
+        # Удаляем из комнат, в которых состоит клиент
+        room_ids = client.rooms
+        if self.backplane and room_ids:
+            task = asyncio.create_task(self.backplane.forget(client_id, room_ids))
+            self._background.add(task)
+            task.add_done_callback(self._background.discard)
+        
+        for room_id in room_ids:
+            clients = self.rooms.get(room_id)
+            if clients is None:
+                continue
+            clients.discard(client_id)
+            logger.debug("📤 %s вышел из комнаты %s", client_id, room_id)
+            # Если комната пустая, удаляем ее
+            if not clients:
+                del self.rooms[room_id]
+                logger.debug("🗑️ Комната %s удалена", room_id)
+        
+        # Удаляем информацию о пользователе
+        self.user_info.pop(client_id, None)
+        self.public_info.pop(client_id, None)
+        logger.debug("📤 Отключился: %s", client_id)
+    
+    async def _writer(self, client: Client) -> None:
+        """Отправлять сообщения из очереди клиента пачками"""
+        client_id = client.client_id
+        websocket = client.ws
+        send = client.send
+        queue = client.outbox
+        while True:
+            # Ждем первое сообщение, затем забираем все уже готовые
+            first = await queue.get()
+            # Части кадра вместе с разделителями: весь массив собирается одним join
+            parts = [b"[", first]
+            count = 1
+            size = len(first)
+            window = COALESCE_WINDOW
+            while True:
+                while count < MAX_BATCH and size < MAX_BATCH_BYTES:
+                    try:
+                        chunk = queue.get_nowait()
+                    except asyncio.QueueEmpty:
+                        break
+                    parts.append(b",")
+                    parts.append(chunk)
+                    count += 1
+                    size += len(chunk)
+                # Несколько сообщений уже ждали - идет всплеск (обычно ICE кандидаты):
+                # коротко ждем продолжение, чтобы отправить его тем же кадром.
+                # Одиночные сообщения уходят без задержки.
+                if count == 1 or not window or count >= MAX_BATCH or size >= MAX_BATCH_BYTES:
+                    break
+                await asyncio.sleep(window)
+                window = 0.0
+            
+            # Одно сообщение уходит как объект, несколько - как JSON массив
+            if count == 1:
+                payload = first
+            else:
+                parts.append(b"]")
+                payload = b"".join(parts)
+            
+            try:
+                await asyncio.wait_for(send({"type": "websocket.send", "bytes": payload}), SEND_TIMEOUT)
+            except RuntimeError:
+                # Сокет уже закрыт (гонка с отключением) - просто завершаем писателя
+                client.alive = False
+                return
+            except asyncio.TimeoutError:
+                # Получатель не забирает данные - отключаем его, чтобы очередь не росла
+                logger.warning("🐢 Клиент %s не принимает данные %s с, отключаем", client_id, SEND_TIMEOUT)
+                client.alive = False
+                await self._close_quietly(websocket, code=1013)
+                return
+            except Exception as e:
+                # Закрываем мертвый сокет: цикл приема завершится и уведомит комнату
+                logger.error("Ошибка отправки клиенту %s: %s", client_id, e)
+                client.alive = False
+                await self._close_quietly(websocket)
+                return
+    
+    async def _close_quietly(self, websocket: WebSocket, code: int = 1011) -> None:
+        """Закрыть соединение, игнорируя ошибки уже закрытого сокета"""
+        try:
+            await asyncio.wait_for(websocket.close(code=code), SEND_TIMEOUT)
+        except Exception:
+            pass
+    
+    async def join_room(self, client_id: str, room_id: str, username: str) -> List[dict]:
+        """Присоединить пользователя к комнате"""
+        # Создаем комнату если нужно
+        room = self.rooms.get(room_id)
+        if room is None:
+            room = self.rooms[room_id] = set()
+            logger.debug("🏠 Создана комната: %s", room_id)
+        
+        # Добавляем в комнату
+        room.add(client_id)
+        client = self.clients.get(client_id)
+        if client is not None:
+            client.rooms.add(room_id)
+        
+        # Сохраняем информацию о пользователе
+        self.user_info[client_id] = {
+            "username": username,
+            "room_id": room_id,
+            "joined_at_ts": time.time()
+        }
+        self.public_info[client_id] = {
+            "client_id": client_id,
+            "username": username,
+            "room_id": room_id
+        }
+        
+        logger.debug("👥 %s (%s) вошел в комнату %s", username, client_id, room_id)
+        
+        # Получаем список других участников: готовые публичные записи, словари не создаются
+        public_info = self.public_info
+        other_users = [public_info[uid] for uid in room if uid != client_id and uid in public_info]
+        
+        # Добавляем участников, подключенных к другим воркерам
+        if self.backplane:
+            members = await self.backplane.remember(client_id, room_id, username)
+            for uid, member_name in members.items():
+                if uid != client_id and uid not in room:
+                    other_users.append({
+                        "client_id": uid,
+                        "username": member_name,
+                        "room_id": room_id
+                    })
+        
+        return other_users
+    
+    async def send_to_client(self, message: dict, client_id: str) -> bool:
+        """Отправить сообщение конкретному клиенту"""
+        return await self.send_payload(orjson.dumps(message), client_id)
+    
+    async def send_payload(self, payload: bytes, client_id: str) -> bool:
+        """Отправить уже сериализованное сообщение конкретному клиенту"""
+        client = self.clients.get(client_id)
+        if client is not None:
+            return self._put(client, payload)
+        # Клиент может быть подключен к другому воркеру
+        if self.backplane:
+            await self.backplane.publish_to_client(client_id, payload)
+            return True
+        return False
+    
+    def _enqueue(self, payload: bytes, client_id: str) -> bool:
+        """Поставить сериализованное сообщение в очередь клиента без ожидания отправки"""
+        client = self.clients.get(client_id)
+        if client is None:
+            return False
+        return self._put(client, payload)
+    
+    def _put(self, client: Client, payload: bytes) -> bool:
+        if not client.alive:
+            return False
+        try:
+            client.outbox.put_nowait(payload)
+            return True
+        except asyncio.QueueFull:
+            pass
+        
+        # Очередь полна: освобождаем место за счет самого старого ICE кандидата
+        if _drop_oldest_ice(client.outbox):
+            client.outbox.put_nowait(payload)
+            return True
+        
+        # В очереди только офферы и ответы - клиент фактически не принимает данные
+        logger.warning("⚠️ Очередь клиента %s переполнена, отключаем", client.client_id)
+        client.alive = False
+        task = asyncio.create_task(self._close_quietly(client.ws, code=1013))
+        self._background.add(task)
+        task.add_done_callback(self._background.discard)
+        return False
+    
+    async def broadcast_to_room(self, message: dict, room_id: str, exclude_client: Optional[str] = None) -> None:
+        """Отправить сообщение всем в комнате, кроме указанного клиента"""
+        # Сериализуем один раз, все получатели разделяют одни и те же байты
+        await self.broadcast_raw(orjson.dumps(message), room_id, exclude_client)
+    
+    async def broadcast_raw(self, payload: bytes, room_id: str, exclude_client: Optional[str] = None) -> None:
+        """Разослать уже сериализованное сообщение всем в комнате"""
+        # Сначала свои участники, затем остальные воркеры через шину
+        self.deliver_to_room(payload, room_id, exclude_client)
+        if self.backplane:
+            await self.backplane.publish_to_room(room_id, payload, exclude_client)
+    
+    def deliver_to_room(self, payload: bytes, room_id: str, exclude_client: Optional[str] = None) -> None:
+        """Разослать готовые байты участникам комнаты, подключенным к этому процессу"""
+        # Отправку выполняют писатели получателей параллельно, поэтому
+        # медленный участник не задерживает рассылку остальным
+        room = self.rooms.get(room_id)
+        if not room:
+            return
+        # Одна разность множеств вместо сравнения с исключенным на каждом шаге
+        recipients = room - {exclude_client} if exclude_client in room else room
+        for client_id in recipients:
+            self._enqueue(payload, client_id)
+    
+    def deliver_to_all(self, payload: bytes) -> None:
+        """Разослать готовые байты всем клиентам этого процесса"""
+        for client in self.clients.values():
+            self._put(client, payload)
+
+def _drop_oldest_ice(queue: asyncio.Queue) -> bool:
+    """Удалить из очереди самый старый ICE кандидат; False, если их нет"""
+    items = cast(Any, queue)._queue
+    for index, payload in enumerate(items):
+        if payload.startswith(ICE_PREFIX):
+            del items[index]
+            return True
+    return False
+
+class RedisBackplane:
+    """Пересылка сигнализации между воркерами через Redis pub/sub"""
+    
+    def __init__(self, url: str, manager: ConnectionManager) -> None:
+        self.url: str = url
+        self.manager: ConnectionManager = manager
+        # Клиент redis.asyncio импортируется лениво, только при включенной шине
+        self.redis: Any = None
+        self.pubsub: Any = None
+        self.listener: Optional[asyncio.Task] = None
+        # Метка воркера: свои же рассылки по комнатам приходят обратно и пропускаются
+        self.origin: str = uuid.uuid4().hex
+    
+    async def start(self) -> None:
+        """Подключиться к Redis и начать слушать каналы клиентов и комнат"""
+        import redis.asyncio as aioredis
+        
+        self.redis = aioredis.from_url(self.url)
+        self.pubsub = self.redis.pubsub()
+        await self.pubsub.psubscribe("client:*", "room:*")
+        self.listener = asyncio.create_task(self._listen())
+        logger.info("🔀 Подключена шина Redis: %s", self.url)
+    
+    async def stop(self) -> None:
+        """Остановить прослушивание и закрыть соединения"""
+        if self.listener:
+            self.listener.cancel()
+        if self.pubsub:
+            await self.pubsub.aclose()
+        if self.redis:
+            await self.redis.aclose()
+    
+    async def publish_to_client(self, client_id: str, payload: bytes) -> None:
+        await self.redis.publish(f"client:{client_id}", payload)
+    
+    async def publish_to_room(self, room_id: str, payload: bytes, exclude_client: Optional[str] = None) -> None:
+        # Заголовок [воркер, исключаемый клиент] отделен переводом строки:
+        # orjson никогда не пишет его в вывод без экранирования
+        header = orjson.dumps([self.origin, exclude_client])
+        await self.redis.publish(f"room:{room_id}", header + b"\n" + payload)
+    
+    async def remember(self, client_id: str, room_id: str, username: str) -> Dict[str, str]:
+        """Записать участника в общий список комнаты и вернуть весь список"""
+        key = f"members:{room_id}"
+        await self.redis.hset(key, client_id, username)
+        members = await self.redis.hgetall(key)
+        return {uid.decode(): name.decode() for uid, name in members.items()}
+    
+    async def forget(self, client_id: str, room_ids: Set[str]) -> None:
+        """Удалить участника из общих списков комнат"""
+        for room_id in room_ids:
+            await self.redis.hdel(f"members:{room_id}", client_id)
+    
+    async def _listen(self) -> None:
+        async for message in self.pubsub.listen():
+            if message["type"] != "pmessage":
+                continue
+            try:
+                kind, _, target = message["channel"].decode().partition(":")
+                data = message["data"]
+                if kind == "client":
+                    self.manager._enqueue(data, target)
+                elif kind == "room":
+                    header, _, payload = data.partition(b"\n")
+                    origin, exclude_client = orjson.loads(header)
+                    if origin != self.origin:
+                        self.manager.deliver_to_room(payload, target, exclude_client)
+            except Exception as e:
+                logger.error("❌ Ошибка обработки сообщения шины: %s", e)
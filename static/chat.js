@@ -0,0 +1,777 @@
+// ============================================
+// КОНФИГУРАЦИЯ И ГЛОБАЛЬНЫЕ ПЕРЕМЕННЫЕ
+// ============================================
+const CONFIG = {
+    ICE_SERVERS: [
+        { urls: 'stun:stun.l.google.com:19302' },
+        { urls: 'stun:stun1.l.google.com:19302' },
+        { urls: 'stun:stun2.l.google.com:19302' },
+        { urls: 'stun:stun3.l.google.com:19302' },
+        { urls: 'stun:stun4.l.google.com:19302' }
+    ],
+    MEDIA_CONSTRAINTS: {
+        video: {
+            width: { ideal: 1280, min: 640, max: 1920 },
+            height: { ideal: 720, min: 480, max: 1080 },
+            frameRate: { ideal: 30, min: 15, max: 60 },
+            facingMode: "user"
+        },
+        audio: {
+            echoCancellation: true,
+            noiseSuppression: true,
+            autoGainControl: true,
+            channelCount: 2
+        }
+    },
+    // Сколько соединений держать заранее созданными (ICE кандидаты собираются до входа в комнату)
+    PC_POOL_SIZE: 3
+};
+
+// Настройки RTCPeerConnection: одинаковые для пула и новых соединений,
+// bundlePolicy и rtcpMuxPolicy после создания поменять нельзя
+const PC_CONFIG = {
+    iceServers: CONFIG.ICE_SERVERS,
+    iceTransportPolicy: 'all',
+    bundlePolicy: 'max-bundle',
+    rtcpMuxPolicy: 'require',
+    iceCandidatePoolSize: 10
+};
+
+// Глобальные переменные
+let ws = null;
+let clientId = null;
+let roomId = null;
+let username = null;
+let localStream = null;
+const peerConnections = new Map();
+const pcPool = [];
+const userNames = new Map();
+let notificationTimeout = null;
+const textDecoder = new TextDecoder();
+
+// Подробный лог в консоль (включать только для отладки: на потоке
+// ICE кандидатов console.log заметно нагружает вкладку)
+const DEBUG = false;
+const debugLog = DEBUG ? console.log.bind(console) : () => {};
+
+// DOM элементы
+const connectBtn = document.getElementById('connectBtn');
+const videoBtn = document.getElementById('videoBtn');
+const stopBtn = document.getElementById('stopBtn');
+const localVideo = document.getElementById('localVideo');
+const localStatus = document.getElementById('localStatus');
+const videoContainer = document.getElementById('videoContainer');
+const remoteVideoPlaceholder = document.getElementById('remoteVideoPlaceholder');
+const notification = document.getElementById('notification');
+const participantCount = document.getElementById('participantCount');
+const connectionStatus = document.getElementById('connectionStatus');
+const cameraStatus = document.getElementById('cameraStatus');
+
+// ============================================
+// УТИЛИТЫ И ВСПОМОГАТЕЛЬНЫЕ ФУНКЦИИ
+// ============================================
+
+function showNotification(message, type = 'info', duration = 5000) {
+    // Скрываем предыдущее уведомление
+    if (notificationTimeout) {
+        clearTimeout(notificationTimeout);
+    }
+
+    // Настраиваем уведомление
+    notification.textContent = message;
+    notification.className = 'notification';
+
+    switch(type) {
+        case 'success':
+            notification.classList.add('notification-success');
+            break;
+        case 'error':
+            notification.classList.add('notification-error');
+            break;
+        case 'info':
+            notification.classList.add('notification-info');
+            break;
+    }
+
+    // Показываем
+    notification.style.display = 'block';
+
+    // Автоскрытие
+    notificationTimeout = setTimeout(() => {
+        notification.style.display = 'none';
+    }, duration);
+}
+
+function hideNotification() {
+    if (notificationTimeout) {
+        clearTimeout(notificationTimeout);
+    }
+    notification.style.display = 'none';
+}
+
+function updateParticipantCount() {
+    const count = peerConnections.size;
+    participantCount.textContent = count;
+}
+
+function updateConnectionStatus(status, isConnected = false) {
+    connectionStatus.textContent = status;
+    connectionStatus.style.color = isConnected ? '#2ecc71' : '#e74c3c';
+}
+
+function updateCameraStatus(status, isActive = false) {
+    cameraStatus.textContent = status;
+    cameraStatus.style.color = isActive ? '#2ecc71' : '#e74c3c';
+}
+
+function updateLocalStatus(isActive) {
+    if (isActive) {
+        localStatus.className = 'status-indicator status-online';
+        updateCameraStatus('Включена', true);
+    } else {
+        localStatus.className = 'status-indicator status-offline';
+        updateCameraStatus('Выключена', false);
+    }
+}
+
+// ID клиента - UUID из 36 символов, другие сервер не принимает
+// (та же функция есть в index.html - меняйте обе)
+function generateClientId() {
+    // crypto.randomUUID есть только в защищенном контексте (HTTPS или localhost),
+    // при входе по IP через HTTP собираем UUID v4 из случайных байтов
+    if (crypto.randomUUID) {
+        return crypto.randomUUID();
+    }
+    const bytes = crypto.getRandomValues(new Uint8Array(16));
+    bytes[6] = (bytes[6] & 0x0f) | 0x40;
+    bytes[8] = (bytes[8] & 0x3f) | 0x80;
+    const hex = Array.from(bytes, b => b.toString(16).padStart(2, '0')).join('');
+    return `${hex.slice(0, 8)}-${hex.slice(8, 12)}-${hex.slice(12, 16)}-${hex.slice(16, 20)}-${hex.slice(20)}`;
+}
+
+// ============================================
+// ПОДКЛЮЧЕНИЕ К КОМНАТЕ
+// ============================================
+
+async function connectToRoom() {
+    // Получаем данные из формы
+    roomId = document.getElementById('roomId').value.trim() || 'комната1';
+    username = document.getElementById('username').value.trim() || 'Пользователь';
+
+    // Генерируем уникальный ID клиента
+    clientId = generateClientId();
+
+    // Обновляем UI
+    connectBtn.disabled = true;
+    connectBtn.innerHTML = '<span>🔄</span><span>Подключаемся...</span>';
+    showNotification('🔄 Подключаемся к серверу...', 'info');
+    updateConnectionStatus('Подключаемся...');
+
+    try {
+        // Определяем URL для WebSocket
+        const protocol = window.location.protocol === 'https:' ? 'wss:' : 'ws:';
+        const hostname = window.location.hostname;
+        const port = window.location.port || (protocol === 'wss:' ? '8443' : '8000');
+        const wsUrl = `${protocol}//${hostname}:${port}/ws/${clientId}`;
+
+        debugLog('WebSocket URL:', wsUrl);
+
+        // Создаем WebSocket соединение
+        ws = new WebSocket(wsUrl);
+        ws.binaryType = 'arraybuffer';
+
+        // Обработчики WebSocket
+        ws.onopen = () => {
+            debugLog('✅ WebSocket подключен');
+            showNotification('✅ Подключено к серверу', 'success');
+            updateConnectionStatus('Подключено', true);
+
+            // Отправляем запрос на присоединение к комнате
+            ws.send(JSON.stringify({
+                type: 'join',
+                room: roomId,
+                username: username
+            }));
+
+            // Обновляем кнопку
+            connectBtn.innerHTML = '<span>✅</span><span>Подключено</span>';
+
+            // Включаем кнопку камеры
+            videoBtn.disabled = false;
+        };
+
+        ws.onmessage = handleWebSocketMessage;
+
+        ws.onclose = (event) => {
+            debugLog('📤 WebSocket отключен:', event.code, event.reason);
+            showNotification('❌ Соединение с сервером потеряно', 'error');
+            updateConnectionStatus('Отключено', false);
+            resetConnection();
+        };
+
+        ws.onerror = (error) => {
+            console.error('❌ WebSocket ошибка:', error);
+            showNotification('❌ Ошибка подключения к серверу', 'error');
+            updateConnectionStatus('Ошибка', false);
+            resetConnection();
+        };
+
+    } catch (error) {
+        console.error('❌ Ошибка подключения:', error);
+        showNotification(`❌ Ошибка: ${error.message}`, 'error');
+        updateConnectionStatus('Ошибка', false);
+        resetConnection();
+    }
+}
+
+// ============================================
+// ОБРАБОТКА СООБЩЕНИЙ ОТ СЕРВЕРА
+// ============================================
+
+function handleWebSocketMessage(event) {
+    try {
+        // Сервер отправляет JSON в бинарных фреймах
+        const text = typeof event.data === 'string' ? event.data : textDecoder.decode(event.data);
+        const data = JSON.parse(text);
+
+        // Сервер может объединить несколько сообщений в один массив
+        if (Array.isArray(data)) {
+            data.forEach(handleServerMessage);
+        } else {
+            handleServerMessage(data);
+        }
+    } catch (error) {
+        console.error('❌ Ошибка обработки сообщения:', error);
+    }
+}
+
+// Обработчики сообщений сервера по типу
+const HANDLERS = Object.freeze({
+    joined: handleJoined,
+    user_joined: handleUserJoined,
+    user_left: handleUserLeft,
+    offer: handleOffer,
+    answer: handleAnswer,
+    ice_candidate: handleIceCandidate,
+    ice_candidates: handleIceCandidates,
+    server_ping: () => {},
+    error: data => showNotification(`❌ Ошибка: ${data.message}`, 'error')
+});
+
+function handleServerMessage(data) {
+    try {
+        const handler = HANDLERS[data.type];
+        if (handler) {
+            handler(data);
+        } else if (DEBUG) {
+            console.warn('Неизвестный тип сообщения:', data.type);
+        }
+    } catch (error) {
+        console.error('❌ Ошибка обработки сообщения:', error);
+    }
+}
+
+function handleJoined(data) {
+    showNotification(`✅ Присоединились к комнате: ${data.room_id}`, 'success');
+
+    // Сохраняем информацию о других участниках
+    if (data.participants && data.participants.length > 0) {
+        showNotification(`👥 В комнате уже есть участники: ${data.participants.map(p => p.username).join(', ')}`);
+
+        // Создаем соединения с существующими участниками (оферы отправят они)
+        data.participants.forEach(participant => {
+            userNames.set(participant.client_id, participant.username);
+            createPeerConnection(participant.client_id);
+        });
+
+        updateParticipantCount();
+    }
+}
+
+function handleUserJoined(data) {
+    const userId = data.client_id;
+    const userName = data.username;
+
+    // Сохраняем имя пользователя
+    userNames.set(userId, userName);
+
+    showNotification(`👋 ${userName} присоединился к комнате`, 'info');
+
+    // Создаем peer connection
+    createPeerConnection(userId).then(pc => {
+        // Отправляем офер новому пользователю
+        if (localStream) {
+            sendOffer(userId);
+        }
+    });
+
+    updateParticipantCount();
+}
+
+function handleUserLeft(data) {
+    const userId = data.client_id;
+    const userName = data.username || userNames.get(userId) || 'Участник';
+
+    showNotification(`👋 ${userName} вышел из комнаты`, 'info');
+
+    // Закрываем peer connection
+    const pc = peerConnections.get(userId);
+    if (pc) {
+        pc.close();
+        peerConnections.delete(userId);
+    }
+
+    // Удаляем имя пользователя
+    userNames.delete(userId);
+
+    // Удаляем видео элемент
+    removeRemoteVideo(userId);
+
+    updateParticipantCount();
+}
+
+// ============================================
+// РАБОТА С КАМЕРОЙ И МИКРОФОНОМ
+// ============================================
+
+async function startVideo() {
+    try {
+        showNotification('🔄 Запрашиваю доступ к камере и микрофону...', 'info');
+
+        // Запрашиваем доступ к медиаустройствам
+        localStream = await navigator.mediaDevices.getUserMedia(CONFIG.MEDIA_CONSTRAINTS);
+
+        // Отображаем локальное видео
+        localVideo.srcObject = localStream;
+        updateLocalStatus(true);
+
+        // Обновляем кнопки
+        videoBtn.disabled = true;
+        stopBtn.disabled = false;
+
+        showNotification('✅ Камера и микрофон включены', 'success');
+
+        // Отправляем оферы всем подключенным пользователям
+        for (const [userId, pc] of peerConnections) {
+            if (pc) {
+                // Добавляем локальные треки в существующее соединение
+                localStream.getTracks().forEach(track => {
+                    try {
+                        pc.addTrack(track, localStream);
+                    } catch (e) {
+                        // Трек уже добавлен, создаем новое соединение
+                        debugLog('Трек уже добавлен, создаем новое соединение');
+                        createPeerConnection(userId).then(newPc => {
+                            sendOffer(userId);
+                        });
+                    }
+                });
+
+                // Отправляем офер
+                await sendOffer(userId);
+            }
+        }
+
+    } catch (error) {
+        console.error('❌ Ошибка при включении камеры:', error);
+        handleCameraError(error);
+    }
+}
+
+function handleCameraError(error) {
+    let message = '❌ Ошибка доступа к медиаустройствам: ';
+
+    if (error.name === 'NotAllowedError') {
+        message += 'Доступ запрещен. Разрешите доступ к камере и микрофону в настройках браузера.';
+    } else if (error.name === 'NotFoundError') {
+        message += 'Камера или микрофон не найдены.';
+    } else if (error.name === 'NotReadableError') {
+        message += 'Не могу получить доступ к камере. Возможно, она уже используется другим приложением.';
+    } else if (error.name === 'OverconstrainedError') {
+        message += 'Запрошенные настройки камеры не поддерживаются.';
+    } else {
+        message += error.message;
+    }
+
+    showNotification(message, 'error');
+    updateLocalStatus(false);
+
+    // Включаем кнопку повторно
+    videoBtn.disabled = false;
+    stopBtn.disabled = true;
+}
+
+function stopVideo() {
+    if (localStream) {
+        // Останавливаем все треки
+        localStream.getTracks().forEach(track => {
+            track.stop();
+        });
+        localStream = null;
+
+        // Очищаем видео элемент
+        localVideo.srcObject = null;
+        updateLocalStatus(false);
+
+        // Закрываем все peer connections
+        for (const pc of peerConnections.values()) {
+            pc.close();
+        }
+        peerConnections.clear();
+
+        // Удаляем все удаленные видео
+        removeAllRemoteVideos();
+
+        // Обновляем кнопки
+        videoBtn.disabled = false;
+        stopBtn.disabled = true;
+
+        showNotification('Камера и микрофон выключены', 'info');
+    }
+}
+
+// ============================================
+// WEBRTC: PEER CONNECTION
+// ============================================
+
+function fillPeerConnectionPool() {
+    while (pcPool.length < CONFIG.PC_POOL_SIZE) {
+        pcPool.push(new RTCPeerConnection(PC_CONFIG));
+    }
+}
+
+function takePooledPeerConnection() {
+    while (pcPool.length > 0) {
+        const pc = pcPool.pop();
+        if (pc.signalingState !== 'closed') {
+            // Пополняем пул вне текущего обработчика
+            setTimeout(fillPeerConnectionPool, 0);
+            return pc;
+        }
+    }
+    return null;
+}
+
+async function createPeerConnection(userId) {
+    // Если соединение уже существует, возвращаем его
+    const existing = peerConnections.get(userId);
+    if (existing) {
+        debugLog(`✅ Соединение с ${userId} уже существует`);
+        return existing;
+    }
+
+    debugLog(`🔗 Создаю новое соединение с ${userId}`);
+
+    // Берем заранее созданное соединение из пула или создаем новое
+    const pc = takePooledPeerConnection() || new RTCPeerConnection(PC_CONFIG);
+
+    peerConnections.set(userId, pc);
+
+    // Добавляем локальные треки если камера включена
+    if (localStream) {
+        localStream.getTracks().forEach(track => {
+            try {
+                pc.addTrack(track, localStream);
+            } catch (e) {
+                debugLog('Трек уже добавлен в это соединение');
+            }
+        });
+    }
+
+    // Обработка ICE кандидатов
+    pc.onicecandidate = (event) => {
+        if (event.candidate && ws && ws.readyState === WebSocket.OPEN) {
+            ws.send(JSON.stringify({
+                type: 'ice_candidate',
+                target: userId,
+                candidate: event.candidate
+            }));
+        }
+    };
+
+    // Обработка изменения состояния ICE соединения
+    pc.oniceconnectionstatechange = () => {
+        debugLog(`ICE состояние для ${userId}:`, pc.iceConnectionState);
+
+        if (pc.iceConnectionState === 'failed' || pc.iceConnectionState === 'disconnected') {
+            debugLog(`Перезапускаю ICE для ${userId}`);
+            pc.restartIce();
+        }
+    };
+
+    // Обработка удаленного потока
+    pc.ontrack = (event) => {
+        debugLog(`🎬 Получен поток от ${userId}`);
+        const stream = event.streams[0];
+
+        // Создаем или обновляем видео элемент
+        createRemoteVideoElement(userId, stream);
+
+        // Показываем уведомление
+        const userName = userNames.get(userId) || 'Участник';
+        showNotification(`✅ Видео от ${userName} получено`, 'success');
+    };
+
+    return pc;
+}
+
+// ============================================
+// WEBRTC: ОБРАБОТКА ОФЕРОВ И ОТВЕТОВ
+// ============================================
+
+async function sendOffer(userId) {
+    const pc = peerConnections.get(userId);
+    if (!pc) {
+        console.error(`❌ Нет соединения для отправки офера ${userId}`);
+        return;
+    }
+
+    try {
+        debugLog(`📤 Создаю офер для ${userId}`);
+
+        const offerOptions = {
+            offerToReceiveAudio: true,
+            offerToReceiveVideo: true,
+            voiceActivityDetection: false
+        };
+
+        const offer = await pc.createOffer(offerOptions);
+        await pc.setLocalDescription(offer);
+
+        if (ws && ws.readyState === WebSocket.OPEN) {
+            ws.send(JSON.stringify({
+                type: 'offer',
+                target: userId,
+                offer: {
+                    sdp: pc.localDescription.sdp,
+                    type: pc.localDescription.type
+                }
+            }));
+
+            debugLog(`✅ Офер отправлен ${userId}`);
+        }
+    } catch (error) {
+        console.error(`❌ Ошибка создания/отправки офера для ${userId}:`, error);
+    }
+}
+
+async function handleOffer(data) {
+    const userId = data.sender;
+    debugLog(`📥 Получен офер от ${userId}`);
+
+    // Создаем или получаем существующее соединение
+    const pc = await createPeerConnection(userId);
+
+    try {
+        await pc.setRemoteDescription(new RTCSessionDescription(data.offer));
+
+        const answerOptions = {
+            voiceActivityDetection: false
+        };
+
+        const answer = await pc.createAnswer(answerOptions);
+        await pc.setLocalDescription(answer);
+
+        if (ws && ws.readyState === WebSocket.OPEN) {
+            ws.send(JSON.stringify({
+                type: 'answer',
+                target: userId,
+                answer: {
+                    sdp: pc.localDescription.sdp,
+                    type: pc.localDescription.type
+                }
+            }));
+
+            debugLog(`✅ Ответ отправлен ${userId}`);
+        }
+    } catch (error) {
+        console.error(`❌ Ошибка обработки офера от ${userId}:`, error);
+    }
+}
+
+async function handleAnswer(data) {
+    const userId = data.sender;
+    const pc = peerConnections.get(userId);
+
+    if (pc) {
+        try {
+            await pc.setRemoteDescription(new RTCSessionDescription(data.answer));
+            debugLog(`✅ Ответ от ${userId} установлен`);
+        } catch (error) {
+            console.error(`❌ Ошибка установки ответа от ${userId}:`, error);
+        }
+    }
+}
+
+async function handleIceCandidate(data) {
+    const userId = data.sender;
+    const pc = peerConnections.get(userId);
+
+    if (pc && data.candidate) {
+        try {
+            await pc.addIceCandidate(new RTCIceCandidate(data.candidate));
+            debugLog(`✅ ICE кандидат от ${userId} добавлен`);
+        } catch (error) {
+            console.error(`❌ Ошибка добавления ICE кандидата от ${userId}:`, error);
+        }
+    }
+}
+
+async function handleIceCandidates(data) {
+    // Сервер объединяет кандидаты, пришедшие подряд, в одно сообщение
+    for (const candidate of data.candidates) {
+        await handleIceCandidate({ sender: data.sender, candidate });
+    }
+}
+
+// ============================================
+// УПРАВЛЕНИЕ ВИДЕО ЭЛЕМЕНТАМИ
+// ============================================
+
+function createRemoteVideoElement(userId, stream) {
+    // Убираем placeholder
+    remoteVideoPlaceholder.style.display = 'none';
+
+    // Удаляем существующее видео если есть
+    removeRemoteVideo(userId);
+
+    // Создаем новый контейнер для видео
+    const videoBox = document.createElement('div');
+    videoBox.className = 'video-box remote';
+    videoBox.id = `remote_${userId}`;
+
+    // Создаем video элемент
+    const video = document.createElement('video');
+    video.id = `remoteVideo_${userId}`;
+    video.autoplay = true;
+    video.playsInline = true;
+    video.srcObject = stream;
+
+    // Создаем оверлей с информацией
+    const overlay = document.createElement('div');
+    overlay.className = 'video-overlay';
+
+    const title = document.createElement('div');
+    title.className = 'video-title';
+
+    const userName = userNames.get(userId) || 'Участник';
+    title.innerHTML = `
+        <span>${userName}</span>
+        <span class="status-indicator status-online"></span>
+    `;
+
+    const status = document.createElement('div');
+    status.className = 'video-status';
+    status.textContent = 'Включено';
+
+    overlay.appendChild(title);
+    overlay.appendChild(status);
+    videoBox.appendChild(video);
+    videoBox.appendChild(overlay);
+
+    // Добавляем в контейнер
+    videoContainer.appendChild(videoBox);
+
+    debugLog(`✅ Видео элемент для ${userId} создан`);
+}
+
+function removeRemoteVideo(userId) {
+    const videoElement = document.getElementById(`remote_${userId}`);
+    if (videoElement) {
+        videoElement.remove();
+        debugLog(`🗑️ Видео элемент ${userId} удален`);
+    }
+
+    // Если больше нет удаленных видео, показываем placeholder
+    const remoteVideos = document.querySelectorAll('.remote.video-box');
+    if (remoteVideos.length === 0) {
+        remoteVideoPlaceholder.style.display = 'block';
+    }
+}
+
+function removeAllRemoteVideos() {
+    // Удаляем все удаленные видео элементы
+    document.querySelectorAll('.remote.video-box').forEach(el => {
+        if (el.id !== 'remoteVideoPlaceholder') {
+            el.remove();
+        }
+    });
+
+    // Показываем placeholder
+    remoteVideoPlaceholder.style.display = 'block';
+}
+
+// ============================================
+// СБРОС СОЕДИНЕНИЯ И ОЧИСТКА
+// ============================================
+
+function resetConnection() {
+    // Закрываем WebSocket
+    if (ws) {
+        ws.close();
+        ws = null;
+    }
+
+    // Выключаем камеру
+    stopVideo();
+
+    // Очищаем peer connections
+    peerConnections.clear();
+    userNames.clear();
+
+    // Удаляем все удаленные видео
+    removeAllRemoteVideos();
+
+    // Сбрасываем кнопки
+    connectBtn.disabled = false;
+    connectBtn.innerHTML = '<span>🔗</span><span>Подключиться к комнате</span>';
+    videoBtn.disabled = true;
+    stopBtn.disabled = true;
+
+    // Сбрасываем статусы
+    updateConnectionStatus('Не подключено', false);
+    updateParticipantCount();
+}
+
+// ============================================
+// ИНИЦИАЛИЗАЦИЯ И ОБРАБОТЧИКИ СОБЫТИЙ
+// ============================================
+
+function initializeEventHandlers() {
+    // Обработка нажатия Enter в полях ввода
+    document.getElementById('roomId').addEventListener('keypress', (e) => {
+        if (e.key === 'Enter') connectToRoom();
+    });
+
+    document.getElementById('username').addEventListener('keypress', (e) => {
+        if (e.key === 'Enter') connectToRoom();
+    });
+
+    // Очистка при закрытии страницы
+    window.addEventListener('beforeunload', () => {
+        if (ws) {
+            ws.close();
+        }
+        if (localStream) {
+            localStream.getTracks().forEach(track => track.stop());
+        }
+    });
+}
+
+// ============================================
+// ЗАГРУЗКА СТРАНИЦЫ
+// ============================================
+
+window.addEventListener('load', () => {
+    debugLog('🚀 Страница видеозвонка загружена');
+    initializeEventHandlers();
+    fillPeerConnectionPool();
+    showNotification('✅ Страница готова к работе', 'success');
+
+    // Автоматически показываем информацию о подключении
+    setTimeout(() => {
+        if (window.location.hostname !== 'localhost' && window.location.hostname !== '127.0.0.1') {
+            showNotification(`📱 Для подключения с других устройств откройте этот же адрес на другом устройстве`, 'info', 10000);
+        }
+    }, 2000);
+});
@@ -0,0 +1,27 @@
+"""Общие заглушки для тестов"""
+import asyncio
+
+
+class FakeWebSocket:
+    """Сокет, который запоминает отправленные кадры"""
+    
+    def __init__(self):
+        self.frames = []
+        self.closed_with = None
+    
+    async def accept(self):
+        pass
+    
+    async def send(self, message):
+        self.frames.append(message["bytes"])
+    
+    async def close(self, code=1000):
+        self.closed_with = code
+
+
+def make_queue(*payloads):
+    """Очередь, уже заполненная сообщениями"""
+    queue = asyncio.Queue()
+    for payload in payloads:
+        queue.put_nowait(payload)
+    return queue
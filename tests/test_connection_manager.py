@@ -0,0 +1,63 @@
+"""Очередь отправки: выбрасывание ICE кандидатов при переполнении"""
+import asyncio
+import unittest
+
+from connection_manager import Client, ConnectionManager, _drop_oldest_ice
+from tests.helpers import FakeWebSocket, make_queue
+
+ICE = b'{"type":"ice_candidate","sender":"a","candidate":{}}'
+ICE_BATCH = b'{"type":"ice_candidates","sender":"a","candidates":[{},{}]}'
+OFFER = b'{"type":"offer","sender":"a","offer":{}}'
+ANSWER = b'{"type":"answer","sender":"a","answer":{}}'
+
+
+class DropOldestIceTest(unittest.TestCase):
+    def test_drops_oldest_single_candidate(self):
+        first = ICE.replace(b'"a"', b'"first"')
+        queue = make_queue(OFFER, first, ICE)
+        self.assertTrue(_drop_oldest_ice(queue))
+        self.assertEqual(list(queue._queue), [OFFER, ICE])
+    
+    def test_keeps_candidate_batches(self):
+        queue = make_queue(ICE_BATCH, OFFER)
+        self.assertFalse(_drop_oldest_ice(queue))
+        self.assertEqual(list(queue._queue), [ICE_BATCH, OFFER])
+    
+    def test_skips_batch_before_single_candidate(self):
+        queue = make_queue(ICE_BATCH, ICE)
+        self.assertTrue(_drop_oldest_ice(queue))
+        self.assertEqual(list(queue._queue), [ICE_BATCH])
+    
+    def test_nothing_to_drop(self):
+        queue = make_queue(OFFER, ANSWER)
+        self.assertFalse(_drop_oldest_ice(queue))
+        self.assertEqual(list(queue._queue), [OFFER, ANSWER])
+
+
+class OverflowTest(unittest.IsolatedAsyncioTestCase):
+    def setUp(self):
+        self.manager = ConnectionManager()
+        self.ws = FakeWebSocket()
+        # Писатель не запущен: очередь только наполняется
+        self.client = Client("c" * 36, self.ws)
+        self.client.outbox = asyncio.Queue(maxsize=2)
+    
+    async def test_full_queue_drops_ice_candidate(self):
+        self.manager._put(self.client, ICE)
+        self.manager._put(self.client, OFFER)
+        self.assertTrue(self.manager._put(self.client, ANSWER))
+        self.assertEqual(list(self.client.outbox._queue), [OFFER, ANSWER])
+        self.assertTrue(self.client.alive)
+    
+    async def test_full_queue_without_ice_disconnects(self):
+        self.manager._put(self.client, OFFER)
+        self.manager._put(self.client, ANSWER)
+        self.assertFalse(self.manager._put(self.client, OFFER))
+        self.assertFalse(self.client.alive)
+        # Сокет закрывается фоновой задачей
+        await asyncio.sleep(0.01)
+        self.assertEqual(self.ws.closed_with, 1013)
+
+
+if __name__ == "__main__":
+    unittest.main()
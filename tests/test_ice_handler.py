@@ -0,0 +1,153 @@
+"""Обработчик ICE кандидатов: сборка пачек и ограничение потока"""
+import asyncio
+import os
+import unittest
+
+import orjson
+
+# Адрес задаем заранее, чтобы импорт сервера не опрашивал сеть
+os.environ.setdefault("SERVER_IP", "127.0.0.1")
+
+import video_server
+from connection_manager import Client, ConnectionManager
+from tests.helpers import FakeWebSocket
+
+ROOM = "room"
+SENDER = "a" * 36
+TARGET = "b" * 36
+
+
+class IceHandlerTestCase(unittest.IsolatedAsyncioTestCase):
+    async def asyncSetUp(self):
+        self.manager = ConnectionManager()
+        # Писатели не запущены: кандидаты остаются в очереди получателя
+        for client_id in (SENDER, TARGET):
+            await self.add_client(client_id)
+        self.target = self.manager.clients[TARGET]
+        self.handle, self.forget = video_server.make_ice_handler(self.manager)
+    
+    async def add_client(self, client_id, room=ROOM):
+        self.manager.clients[client_id] = Client(client_id, FakeWebSocket())
+        await self.manager.join_room(client_id, room, client_id[:1])
+    
+    async def send(self, count, sender=SENDER, target=TARGET):
+        for i in range(count):
+            await self.handle(sender, {"type": "ice_candidate", "target": target, "candidate": {"n": i}})
+    
+    async def received(self, client=None):
+        """Кандидаты, дошедшие до очереди получателя после окна сборки"""
+        client = client or self.target
+        await asyncio.sleep(video_server.ICE_BATCH_WINDOW * 2)
+        candidates = []
+        while not client.outbox.empty():
+            message = orjson.loads(client.outbox.get_nowait())
+            if message["type"] == "ice_candidates":
+                candidates.extend(message["candidates"])
+            else:
+                candidates.append(message["candidate"])
+        return candidates
+
+
+class IceBatchTest(IceHandlerTestCase):
+    async def test_candidates_in_window_form_one_batch(self):
+        await self.send(3)
+        await asyncio.sleep(video_server.ICE_BATCH_WINDOW * 2)
+        self.assertEqual(self.target.outbox.qsize(), 1)
+        message = orjson.loads(self.target.outbox.get_nowait())
+        self.assertEqual(message["type"], "ice_candidates")
+        self.assertEqual(message["sender"], SENDER)
+        self.assertEqual(message["candidates"], [{"n": 0}, {"n": 1}, {"n": 2}])
+    
+    async def test_single_candidate_keeps_old_format(self):
+        await self.send(1)
+        await asyncio.sleep(video_server.ICE_BATCH_WINDOW * 2)
+        message = orjson.loads(self.target.outbox.get_nowait())
+        self.assertEqual(message["type"], "ice_candidate")
+        self.assertEqual(message["candidate"], {"n": 0})
+
+
+class IceRateLimitTest(IceHandlerTestCase):
+    async def test_burst_over_limit_is_dropped(self):
+        burst = int(video_server.ICE_BURST)
+        await self.send(burst + 30)
+        self.assertEqual(await self.received(), [{"n": i} for i in range(burst)])
+    
+    async def test_tokens_refill_over_time(self):
+        await self.send(int(video_server.ICE_BURST))
+        await self.received()
+        # Пустая корзина за 0.1 с набирает не меньше ICE_RATE / 10 токенов, но не полную
+        await asyncio.sleep(0.1)
+        await self.send(int(video_server.ICE_BURST))
+        refilled = len(await self.received())
+        self.assertGreaterEqual(refilled, int(video_server.ICE_RATE * 0.1))
+        self.assertLess(refilled, int(video_server.ICE_BURST))
+    
+    async def test_senders_are_limited_separately(self):
+        other = "c" * 36
+        await self.add_client(other)
+        await self.send(int(video_server.ICE_BURST) + 10)
+        await self.send(3, sender=other)
+        self.assertEqual(len(await self.received()), int(video_server.ICE_BURST) + 3)
+    
+    async def test_forget_resets_sender_buckets(self):
+        await self.send(int(video_server.ICE_BURST))
+        await self.received()
+        self.forget(SENDER)
+        await self.send(3)
+        self.assertEqual(len(await self.received()), 3)
+
+
+class FakeBackplane:
+    """Шина, которая запоминает кандидатов для других воркеров"""
+    
+    def __init__(self):
+        self.published = []
+    
+    async def publish_to_client(self, client_id, payload):
+        message = orjson.loads(payload)
+        self.published.extend(message.get("candidates") or [message.get("candidate")])
+
+
+class IceTargetTest(IceHandlerTestCase):
+    async def test_unknown_targets_are_dropped(self):
+        # Смена target не обходит лимит: выдуманные получатели отбрасываются
+        for i in range(100):
+            await self.send(1, target="%036d" % i)
+        await self.send(1)
+        self.assertEqual(await self.received(), [{"n": 0}])
+    
+    async def test_target_outside_shared_room_is_dropped(self):
+        stranger = "c" * 36
+        await self.add_client(stranger, room="other")
+        await self.send(3, target=stranger)
+        self.assertEqual(await self.received(self.manager.clients[stranger]), [])
+    
+    async def test_forget_target_resets_its_buckets(self):
+        await self.send(int(video_server.ICE_BURST))
+        await self.received()
+        # Получатель отключился и подключился снова с тем же ID
+        self.forget(TARGET)
+        await self.send(3)
+        self.assertEqual(len(await self.received()), 3)
+    
+    async def test_remote_targets_share_sender_limit(self):
+        backplane = self.manager.backplane = FakeBackplane()
+        # Получатели на других воркерах не проверяются, их держит общий лимит отправителя
+        count = int(video_server.ICE_SENDER_BURST) + 100
+        for i in range(count):
+            await self.send(1, target="%036d" % (i % video_server.ICE_MAX_TARGETS))
+        await self.received()
+        # Пока идет цикл, корзина успевает добрать несколько токенов
+        self.assertGreaterEqual(len(backplane.published), int(video_server.ICE_SENDER_BURST))
+        self.assertLess(len(backplane.published), count)
+    
+    async def test_remote_targets_are_capped(self):
+        backplane = self.manager.backplane = FakeBackplane()
+        for i in range(video_server.ICE_MAX_TARGETS + 20):
+            await self.send(1, target="%036d" % i)
+        await self.received()
+        self.assertEqual(len(backplane.published), video_server.ICE_MAX_TARGETS)
+
+
+if __name__ == "__main__":
+    unittest.main()
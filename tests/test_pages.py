@@ -0,0 +1,125 @@
+"""Страницы: готовые сжатые варианты, выбор кодировки и ответы 304"""
+import gzip
+import os
+import unittest
+
+# Адрес задаем заранее, чтобы импорт сервера не опрашивал сеть
+os.environ.setdefault("SERVER_IP", "127.0.0.1")
+
+from starlette.requests import Request
+from starlette.testclient import TestClient
+
+import video_server
+
+
+def make_request(**headers):
+    scope = {
+        "type": "http",
+        "method": "GET",
+        "path": "/chat",
+        "headers": [(name.replace("_", "-").encode(), value.encode()) for name, value in headers.items()],
+    }
+    return Request(scope)
+
+
+class PageResponseTest(unittest.TestCase):
+    def setUp(self):
+        self.client = TestClient(video_server.app)
+    
+    def test_gzip_variant_is_served_whole(self):
+        response = self.client.get("/chat", headers={"accept-encoding": "gzip"})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.headers["content-encoding"], "gzip")
+        self.assertEqual(response.headers["content-type"], "text/html; charset=utf-8")
+        _, body, _ = video_server.CHAT_PAGE["gzip"]
+        self.assertEqual(int(response.headers["content-length"]), len(body))
+        self.assertEqual(response.content, gzip.decompress(body))
+    
+    def test_every_request_gets_own_response(self):
+        # FastAPI записывает в ответ фоновые задачи запроса
+        request = make_request(accept_encoding="gzip")
+        first = video_server.page_response(video_server.CHAT_PAGE, request)
+        second = video_server.page_response(video_server.CHAT_PAGE, request)
+        self.assertIsNot(first, second)
+        self.assertEqual(first.body, second.body)
+
+
+ALL = ("br", "gzip", "identity")
+
+
+class ChooseEncodingTest(unittest.TestCase):
+    def choose(self, accept, available=ALL):
+        return video_server.choose_encoding(accept, available)
+    
+    def test_prefers_denser_encoding_on_tie(self):
+        self.assertEqual(self.choose("gzip, deflate, br"), "br")
+    
+    def test_without_brotli_falls_back_to_gzip(self):
+        self.assertEqual(self.choose("gzip, br", ("gzip", "identity")), "gzip")
+    
+    def test_q_zero_forbids_encoding(self):
+        self.assertEqual(self.choose("gzip;q=0"), "identity")
+        self.assertEqual(self.choose("br;q=0, gzip"), "gzip")
+    
+    def test_higher_q_wins(self):
+        self.assertEqual(self.choose("br;q=0.5, gzip"), "gzip")
+        self.assertEqual(self.choose("br;q=0.5, gzip;q=0.4"), "br")
+    
+    def test_star(self):
+        self.assertEqual(self.choose("*"), "br")
+        self.assertEqual(self.choose("*;q=0"), "identity")
+        self.assertEqual(self.choose("gzip, *;q=0"), "gzip")
+    
+    def test_malformed_q_forbids_encoding(self):
+        self.assertEqual(self.choose("br;q=abc, gzip"), "gzip")
+        self.assertEqual(self.choose("gzip;q="), "identity")
+    
+    def test_empty_or_unknown_header(self):
+        self.assertEqual(self.choose(""), "identity")
+        self.assertEqual(self.choose("identity"), "identity")
+        self.assertEqual(self.choose(" , ;q=1"), "identity")
+    
+    def test_case_and_spaces_are_ignored(self):
+        self.assertEqual(self.choose(" GZIP ; Q=1 "), "gzip")
+
+
+class EtagMatchesTest(unittest.TestCase):
+    ETAG = '"abc-gzip"'
+    
+    def test_exact_tag(self):
+        self.assertTrue(video_server.etag_matches('"abc-gzip"', self.ETAG))
+        self.assertFalse(video_server.etag_matches('"abc-br"', self.ETAG))
+    
+    def test_weak_tag_matches(self):
+        self.assertTrue(video_server.etag_matches('W/"abc-gzip"', self.ETAG))
+    
+    def test_list_of_tags(self):
+        self.assertTrue(video_server.etag_matches('"zzz", W/"abc-gzip" ,"yyy"', self.ETAG))
+        self.assertFalse(video_server.etag_matches('"zzz", "yyy"', self.ETAG))
+    
+    def test_star_matches_any(self):
+        self.assertTrue(video_server.etag_matches("*", self.ETAG))
+
+
+class ConditionalPageTest(unittest.TestCase):
+    def setUp(self):
+        self.client = TestClient(video_server.app)
+    
+    def test_matching_etag_returns_304_without_body(self):
+        first = self.client.get("/chat", headers={"accept-encoding": "gzip"})
+        etag = first.headers["etag"]
+        response = self.client.get("/chat", headers={"accept-encoding": "gzip", "if-none-match": "W/" + etag})
+        self.assertEqual(response.status_code, 304)
+        self.assertEqual(response.content, b"")
+        self.assertEqual(response.headers["etag"], etag)
+    
+    def test_etag_of_other_encoding_does_not_match(self):
+        etag = self.client.get("/", headers={"accept-encoding": "gzip"}).headers["etag"]
+        response = self.client.get("/", headers={"accept-encoding": "identity", "if-none-match": etag})
+        self.assertEqual(response.status_code, 200)
+        self.assertNotEqual(response.headers["etag"], etag)
+        self.assertNotIn("content-encoding", response.headers)
+
+
+if __name__ == "__main__":
+    unittest.main()
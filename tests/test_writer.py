@@ -0,0 +1,63 @@
+"""Писатель клиента: сборка пачек и окно добора"""
+import asyncio
+import unittest
+
+import orjson
+
+import connection_manager
+from connection_manager import ConnectionManager
+from tests.helpers import FakeWebSocket
+
+CLIENT = "c" * 36
+ICE = b'{"type":"ice_candidate","sender":"a","candidate":{}}'
+OFFER = b'{"type":"offer","sender":"a","offer":{}}'
+ANSWER = b'{"type":"answer","sender":"a","answer":{}}'
+
+
+class WriterTest(unittest.IsolatedAsyncioTestCase):
+    async def asyncSetUp(self):
+        self.manager = ConnectionManager()
+        self.ws = FakeWebSocket()
+        await self.manager.connect(self.ws, CLIENT)
+        self.client = self.manager.clients[CLIENT]
+    
+    async def asyncTearDown(self):
+        self.manager.disconnect(CLIENT)
+    
+    async def drain(self):
+        # Ждем окно добора и отправку
+        await asyncio.sleep(connection_manager.COALESCE_WINDOW * 4)
+    
+    async def test_single_message_is_sent_as_object(self):
+        self.manager._put(self.client, OFFER)
+        await self.drain()
+        self.assertEqual(self.ws.frames, [OFFER])
+    
+    async def test_queued_messages_are_sent_as_one_array(self):
+        for payload in (OFFER, ICE, ANSWER):
+            self.manager._put(self.client, payload)
+        await self.drain()
+        self.assertEqual(len(self.ws.frames), 1)
+        self.assertEqual(orjson.loads(self.ws.frames[0]),
+                         [orjson.loads(OFFER), orjson.loads(ICE), orjson.loads(ANSWER)])
+    
+    async def test_burst_within_window_joins_frame(self):
+        self.manager._put(self.client, OFFER)
+        self.manager._put(self.client, ICE)
+        # Продолжение всплеска приходит внутри окна добора
+        await asyncio.sleep(0)
+        self.manager._put(self.client, ICE)
+        await self.drain()
+        self.assertEqual(len(self.ws.frames), 1)
+        self.assertEqual(len(orjson.loads(self.ws.frames[0])), 3)
+    
+    async def test_batch_respects_message_limit(self):
+        for _ in range(connection_manager.MAX_BATCH + 1):
+            self.manager._put(self.client, ICE)
+        await self.drain()
+        sizes = [len(orjson.loads(frame)) if frame.startswith(b"[") else 1 for frame in self.ws.frames]
+        self.assertEqual(sizes, [connection_manager.MAX_BATCH, 1])
+
+
+if __name__ == "__main__":
+    unittest.main()
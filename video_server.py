@@ -1,130 +1,170 @@
-from fastapi import FastAPI, WebSocket, WebSocketDisconnect
-from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import HTMLResponse
+from fastapi import FastAPI, Request, Response, WebSocket, WebSocketDisconnect
+from fastapi.responses import HTMLResponse, ORJSONResponse
+from fastapi.staticfiles import StaticFiles
 import uvicorn
-import json
+import orjson
+import gzip
 import uuid
 import asyncio
 from datetime import datetime
-from typing import Dict, List
 import socket
 import logging
+import logging.handlers
+import queue
+import atexit
+from contextlib import asynccontextmanager
+import os
+import functools
+import time
+import hashlib
 
-# Настройка логирования
-logging.basicConfig(level=logging.INFO)
+from connection_manager import ConnectionManager, RedisBackplane
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+# Настройка логирования: вывод выполняет отдельный поток,
+# цикл событий только кладет записи в очередь
+log_queue = queue.SimpleQueue()
+log_listener = logging.handlers.QueueListener(log_queue, logging.StreamHandler())
+logging.basicConfig(level=logging.INFO, handlers=[logging.handlers.QueueHandler(log_queue)])
+log_listener.start()
+atexit.register(log_listener.stop)
 logger = logging.getLogger(__name__)
 
+@functools.lru_cache(maxsize=1)
 def get_local_ip():
     """Получить локальный IP адрес"""
+    # Адрес можно задать явно, тогда сеть не опрашивается
+    ip = os.getenv("SERVER_IP")
+    if ip:
+        return ip
+    
+    # Адрес по имени хоста, если он не петлевой
+    try:
+        for info in socket.getaddrinfo(socket.gethostname(), None, socket.AF_INET):
+            ip = info[4][0]
+            if not ip.startswith("127."):
+                return ip
+    except OSError:
+        pass
+    
+    # Последний вариант: маршрут до внешнего адреса (пакеты не отправляются)
+    s = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
     try:
-        s = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+        s.settimeout(0.2)
         s.connect(("8.8.8.8", 80))
-        ip = s.getsockname()[0]
-        s.close()
-        return ip
-    except:
+        return s.getsockname()[0]
+    except OSError:
         return "127.0.0.1"
+    finally:
+        s.close()
 
 LOCAL_IP = get_local_ip()
 print(f"🌐 Server IP: {LOCAL_IP}")
 
-app = FastAPI(title="Video Chat Server")
+# Redis для обмена сигнализацией между воркерами (если не задан - работаем в одном процессе)
+REDIS_URL = os.getenv("BACKPLANE_URL") or os.getenv("REDIS_URL")
 
-# CORS для кросс-доменных запросов
-app.add_middleware(
-    CORSMiddleware,
-    allow_origins=["*"],
-    allow_credentials=True,
-    allow_methods=["*"],
-    allow_headers=["*"],
-)
+# Максимальный размер входящего сообщения (SDP обычно занимает 4-20 КБ)
+MAX_MESSAGE_SIZE = int(os.getenv("MAX_MESSAGE_SIZE", str(64 * 1024)))
 
-class ConnectionManager:
-    def __init__(self):
-        self.active_connections: Dict[str, WebSocket] = {}
-        self.rooms: Dict[str, List[str]] = {}
-        self.user_info: Dict[str, dict] = {}
-    
-    async def connect(self, websocket: WebSocket, client_id: str):
-        await websocket.accept()
-        self.active_connections[client_id] = websocket
-        logger.info(f"✅ Подключился: {client_id}")
-        return True
+# Как часто писать в лог сводку по подключениям, секунд
+STATS_LOG_INTERVAL = 60
+
+manager = ConnectionManager()
+
+def enable_eager_tasks():
+    """Включить eager-фабрику задач (Python 3.12+)
     
-    def disconnect(self, client_id: str):
-        # Удаляем из комнаты
-        user_data = self.user_info.get(client_id, {})
-        room_id = user_data.get("room_id")
-        
-        if room_id and room_id in self.rooms:
-            if client_id in self.rooms[room_id]:
-                self.rooms[room_id].remove(client_id)
-                logger.info(f"📤 {client_id} вышел из комнаты {room_id}")
-                # Если комната пустая, удаляем ее
-                if not self.rooms[room_id]:
-                    del self.rooms[room_id]
-                    logger.info(f"🗑️ Комната {room_id} удалена")
-        
-        # Удаляем соединение
-        self.active_connections.pop(client_id, None)
-        self.user_info.pop(client_id, None)
-        logger.info(f"📤 Отключился: {client_id}")
+    Задача сразу выполняется до первого await, без лишнего прохода
+    цикла событий - например, писатель клиента сразу встает на очереди.
+    """
+    eager_task_factory = getattr(asyncio, "eager_task_factory", None)
+    if eager_task_factory is not None:
+        asyncio.get_running_loop().set_task_factory(eager_task_factory)
+
+# Время для поля timestamp: строка и ее байты обновляются фоновой задачей
+# раз в TIMESTAMP_INTERVAL секунд, сообщения берут готовое значение
+TIMESTAMP_INTERVAL = 0.1
+_now = datetime.now().isoformat()
+_TS = [_now, _now.encode()]
+
+async def refresh_timestamp():
+    """Обновлять кэшированное время сообщений"""
+    while True:
+        now = datetime.now().isoformat()
+        _TS[0], _TS[1] = now, now.encode()
+        await asyncio.sleep(TIMESTAMP_INTERVAL)
+
+# Как часто сервер рассылает всем клиентам server_ping, секунд
+KEEPALIVE_INTERVAL = 20
+
+async def keepalive():
+    """Одно сообщение на всех вместо ping/pong от каждой вкладки"""
+    while True:
+        await asyncio.sleep(KEEPALIVE_INTERVAL)
+        manager.deliver_to_all(orjson.dumps({"type": "server_ping", "timestamp": _TS[0]}))
+
+async def log_connection_stats():
+    """Периодически писать сводку вместо записи о каждом подключении"""
+    last = None
+    while True:
+        await asyncio.sleep(STATS_LOG_INTERVAL)
+        current = (len(manager.clients), len(manager.rooms))
+        if current != last:
+            logger.info("📊 Подключений: %d, комнат: %d", *current)
+            last = current
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    enable_eager_tasks()
     
-    async def join_room(self, client_id: str, room_id: str, username: str) -> List[dict]:
-        """Присоединить пользователя к комнате"""
-        # Создаем комнату если нужно
-        if room_id not in self.rooms:
-            self.rooms[room_id] = []
-            logger.info(f"🏠 Создана комната: {room_id}")
-        
-        # Добавляем в комнату
-        self.rooms[room_id].append(client_id)
-        
-        # Сохраняем информацию о пользователе
-        self.user_info[client_id] = {
-            "username": username,
-            "room_id": room_id,
-            "joined_at": datetime.now().isoformat()
-        }
-        
-        logger.info(f"👥 {username} ({client_id}) вошел в комнату {room_id}")
-        
-        # Получаем список других участников
-        other_users = []
-        for uid in self.rooms[room_id]:
-            if uid != client_id:
-                user_data = self.user_info.get(uid, {})
-                other_users.append({
-                    "client_id": uid,
-                    "username": user_data.get("username", "Unknown"),
-                    "room_id": room_id
-                })
-        
-        return other_users
+    # Подключаем шину Redis, если она настроена
+    if REDIS_URL:
+        manager.backplane = RedisBackplane(REDIS_URL, manager)
+        await manager.backplane.start()
     
-    async def send_to_client(self, message: dict, client_id: str) -> bool:
-        """Отправить сообщение конкретному клиенту"""
-        if client_id in self.active_connections:
-            try:
-                await self.active_connections[client_id].send_json(message)
-                return True
-            except Exception as e:
-                logger.error(f"Ошибка отправки клиенту {client_id}: {e}")
-                return False
-        return False
+    stats_task = asyncio.create_task(log_connection_stats())
+    clock_task = asyncio.create_task(refresh_timestamp())
+    keepalive_task = asyncio.create_task(keepalive())
+    try:
+        yield
+    finally:
+        stats_task.cancel()
+        clock_task.cancel()
+        keepalive_task.cancel()
+        if manager.backplane:
+            await manager.backplane.stop()
+
+# JSON ответы HTTP эндпоинтов тоже сериализует orjson, как и сообщения WebSocket
+app = FastAPI(title="Video Chat Server", lifespan=lifespan, default_response_class=ORJSONResponse)
+
+
+# Страницы не меняются во время работы - собираем байты один раз при импорте
+PAGE_HEADERS = {"Cache-Control": "public, max-age=300"}
+STATIC_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "static")
+
+class VersionedStaticFiles(StaticFiles):
+    """Статика, которую браузер кэширует навсегда, если в ссылке есть ?v=хэш"""
     
-    async def broadcast_to_room(self, message: dict, room_id: str, exclude_client: str = None):
-        """Отправить сообщение всем в комнате, кроме указанного клиента"""
-        if room_id in self.rooms:
-            for client_id in self.rooms[room_id]:
-                if client_id != exclude_client:
-                    await self.send_to_client(message, client_id)
+    def file_response(self, full_path, stat_result, scope, status_code=200):
+        response = super().file_response(full_path, stat_result, scope, status_code)
+        if scope.get("query_string", b"").startswith(b"v="):
+            response.headers["Cache-Control"] = "public, max-age=31536000, immutable"
+        return response
 
-manager = ConnectionManager()
+app.mount("/static", VersionedStaticFiles(directory=STATIC_DIR), name="static")
 
-@app.get("/")
-async def home():
-    return HTMLResponse(f"""
+def asset_url(name: str) -> str:
+    """Ссылка на файл из static с хэшем содержимого: новая версия - новая ссылка"""
+    with open(os.path.join(STATIC_DIR, name), "rb") as f:
+        version = hashlib.sha1(f.read()).hexdigest()[:8]
+    return f"/static/{name}?v={version}"
+
+HOME_HTML = f"""
     <!DOCTYPE html>
     <html>
     <head>
@@ -220,1225 +260,166 @@ async def home():
         </div>
     </body>
     </html>
-    """)
+    """.encode()
 
-@app.get("/chat")
-async def chat_page():
-    html_content = """
-    <!DOCTYPE html>
-<html lang="ru">
-<head>
-    <meta charset="UTF-8">
-    <meta name="viewport" content="width=device-width, initial-scale=1.0">
-    <title>🎥 Видеозвонок</title>
-    <style>
-        :root {
-            --primary-color: #4a6ee0;
-            --secondary-color: #6a11cb;
-            --success-color: #2ecc71;
-            --danger-color: #e74c3c;
-            --warning-color: #f39c12;
-            --dark-color: #2c3e50;
-            --light-color: #ecf0f1;
-        }
-        
-        * {
-            margin: 0;
-            padding: 0;
-            box-sizing: border-box;
-        }
-        
-        body {
-            font-family: 'Segoe UI', 'Roboto', 'Helvetica Neue', Arial, sans-serif;
-            background: linear-gradient(135deg, #667eea 0%, #764ba2 100%);
-            color: #333;
-            min-height: 100vh;
-            padding: 20px;
-        }
-        
-        .container {
-            max-width: 1400px;
-            margin: 0 auto;
-            background: rgba(255, 255, 255, 0.95);
-            border-radius: 20px;
-            box-shadow: 0 20px 60px rgba(0, 0, 0, 0.3);
-            overflow: hidden;
-        }
-        
-        /* Шапка */
-        header {
-            background: linear-gradient(135deg, var(--primary-color), var(--secondary-color));
-            color: white;
-            padding: 30px 40px;
-            text-align: center;
-            border-bottom: 1px solid rgba(255, 255, 255, 0.1);
-        }
-        
-        header h1 {
-            font-size: 36px;
-            margin-bottom: 10px;
-            font-weight: 700;
-        }
-        
-        header p {
-            font-size: 18px;
-            opacity: 0.9;
-            max-width: 600px;
-            margin: 0 auto;
-        }
-        
-        /* Панель управления */
-        .controls-panel {
-            padding: 30px 40px;
-            background: var(--light-color);
-            border-bottom: 1px solid #ddd;
-            display: grid;
-            grid-template-columns: repeat(auto-fit, minmax(250px, 1fr));
-            gap: 20px;
-            align-items: end;
-        }
-        
-        .control-group {
-            display: flex;
-            flex-direction: column;
-            gap: 8px;
-        }
-        
-        .control-group label {
-            font-weight: 600;
-            color: var(--dark-color);
-            font-size: 14px;
-            text-transform: uppercase;
-            letter-spacing: 0.5px;
-        }
-        
-        .input-field {
-            padding: 14px 18px;
-            border: 2px solid #ddd;
-            border-radius: 12px;
-            font-size: 16px;
-            transition: all 0.3s;
-            background: white;
-        }
-        
-        .input-field:focus {
-            outline: none;
-            border-color: var(--primary-color);
-            box-shadow: 0 0 0 3px rgba(74, 110, 224, 0.1);
-        }
-        
-        .btn {
-            padding: 16px 28px;
-            border: none;
-            border-radius: 12px;
-            font-size: 16px;
-            font-weight: 600;
-            cursor: pointer;
-            transition: all 0.3s;
-            display: flex;
-            align-items: center;
-            justify-content: center;
-            gap: 10px;
-            text-transform: uppercase;
-            letter-spacing: 0.5px;
-        }
-        
-        .btn-primary {
-            background: linear-gradient(135deg, var(--primary-color), var(--secondary-color));
-            color: white;
-        }
-        
-        .btn-primary:hover {
-            transform: translateY(-2px);
-            box-shadow: 0 10px 20px rgba(74, 110, 224, 0.3);
-        }
-        
-        .btn-success {
-            background: linear-gradient(135deg, var(--success-color), #27ae60);
-            color: white;
-        }
-        
-        .btn-success:hover {
-            transform: translateY(-2px);
-            box-shadow: 0 10px 20px rgba(46, 204, 113, 0.3);
-        }
-        
-        .btn-danger {
-            background: linear-gradient(135deg, var(--danger-color), #c0392b);
-            color: white;
-        }
-        
-        .btn-danger:hover {
-            transform: translateY(-2px);
-            box-shadow: 0 10px 20px rgba(231, 76, 60, 0.3);
-        }
-        
-        .btn:disabled {
-            opacity: 0.5;
-            cursor: not-allowed;
-            transform: none !important;
-            box-shadow: none !important;
-        }
-        
-        /* Видео контейнер */
-        .video-container {
-            display: grid;
-            grid-template-columns: repeat(auto-fit, minmax(500px, 1fr));
-            gap: 30px;
-            padding: 40px;
-        }
-        
-        .video-box {
-            background: var(--dark-color);
-            border-radius: 20px;
-            overflow: hidden;
-            box-shadow: 0 15px 35px rgba(0, 0, 0, 0.2);
-            position: relative;
-            transition: all 0.3s;
-            border: 4px solid transparent;
-        }
-        
-        .video-box.local {
-            border-color: var(--success-color);
-        }
-        
-        .video-box.remote {
-            border-color: var(--primary-color);
-        }
-        
-        .video-box:hover {
-            transform: translateY(-5px);
-            box-shadow: 0 20px 40px rgba(0, 0, 0, 0.3);
-        }
-        
-        video {
-            width: 100%;
-            height: auto;
-            display: block;
-            background: #000;
-            min-height: 400px;
-            object-fit: cover;
-        }
-        
-        .video-overlay {
-            position: absolute;
-            bottom: 0;
-            left: 0;
-            right: 0;
-            background: linear-gradient(transparent, rgba(0, 0, 0, 0.9));
-            padding: 25px;
-            color: white;
-        }
-        
-        .video-title {
-            font-size: 20px;
-            font-weight: 700;
-            margin-bottom: 5px;
-            display: flex;
-            align-items: center;
-            gap: 10px;
-        }
-        
-        .video-status {
-            display: flex;
-            align-items: center;
-            gap: 12px;
-            font-size: 14px;
-            opacity: 0.9;
-        }
-        
-        .status-indicator {
-            width: 12px;
-            height: 12px;
-            border-radius: 50%;
-            display: inline-block;
-        }
-        
-        .status-online {
-            background: var(--success-color);
-            animation: pulse 2s infinite;
-        }
-        
-        .status-offline {
-            background: var(--danger-color);
-        }
-        
-        @keyframes pulse {
-            0%, 100% { opacity: 1; }
-            50% { opacity: 0.5; }
-        }
-        
-        .empty-state {
-            display: flex;
-            flex-direction: column;
-            align-items: center;
-            justify-content: center;
-            min-height: 400px;
-            color: #999;
-            text-align: center;
-            padding: 40px;
-        }
-        
-        .empty-state-icon {
-            font-size: 80px;
-            margin-bottom: 20px;
-            opacity: 0.5;
-        }
-        
-        /* Уведомления */
-        .notification {
-            position: fixed;
-            top: 30px;
-            right: 30px;
-            padding: 20px 25px;
-            border-radius: 12px;
-            color: white;
-            font-weight: 600;
-            box-shadow: 0 10px 30px rgba(0, 0, 0, 0.2);
-            z-index: 1000;
-            animation: slideInRight 0.3s ease;
-            max-width: 400px;
-        }
-        
-        .notification-success {
-            background: linear-gradient(135deg, var(--success-color), #27ae60);
-        }
-        
-        .notification-error {
-            background: linear-gradient(135deg, var(--danger-color), #c0392b);
-        }
-        
-        .notification-info {
-            background: linear-gradient(135deg, var(--primary-color), var(--secondary-color));
-        }
-        
-        @keyframes slideInRight {
-            from { transform: translateX(100%); opacity: 0; }
-            to { transform: translateX(0); opacity: 1; }
-        }
-        
-        /* Индикаторы */
-        .stats-bar {
-            display: flex;
-            justify-content: space-between;
-            padding: 20px 40px;
-            background: rgba(44, 62, 80, 0.05);
-            border-top: 1px solid #eee;
-            font-size: 14px;
-            color: #666;
-        }
-        
-        .stat-item {
-            display: flex;
-            align-items: center;
-            gap: 8px;
-        }
-        
-        /* Адаптивность */
-        @media (max-width: 1200px) {
-            .video-container {
-                grid-template-columns: 1fr;
-            }
-            
-            .video-box {
-                min-height: 400px;
-            }
-        }
-        
-        @media (max-width: 768px) {
-            .controls-panel {
-                grid-template-columns: 1fr;
-            }
-            
-            .video-container {
-                padding: 20px;
-                gap: 20px;
-            }
-            
-            header, .controls-panel {
-                padding: 20px;
-            }
-            
-            header h1 {
-                font-size: 28px;
-            }
-        }
-    </style>
-</head>
-<body>
-    <div class="container">
-        <!-- Шапка -->
-        <header>
-            <h1>🎥 Видеозвонок</h1>
-            <p>Подключитесь к комнате для начала видеозвонка с друзьями и коллегами</p>
-        </header>
-        
-        <!-- Панель управления -->
-        <div class="controls-panel">
-            <div class="control-group">
-                <label for="username">👤 Ваше имя</label>
-                <input type="text" id="username" class="input-field" placeholder="Введите ваше имя" value="Пользователь">
-            </div>
-            
-            <div class="control-group">
-                <label for="roomId">🏠 ID комнаты</label>
-                <input type="text" id="roomId" class="input-field" placeholder="Введите ID комнаты" value="комната1">
-            </div>
-            
-            <div class="control-group">
-                <label>&nbsp;</label>
-                <button class="btn btn-primary" onclick="connectToRoom()" id="connectBtn">
-                    <span>🔗</span>
-                    <span>Подключиться к комнате</span>
-                </button>
-            </div>
-            
-            <div class="control-group">
-                <label>&nbsp;</label>
-                <button class="btn btn-success" onclick="startVideo()" id="videoBtn" disabled>
-                    <span>📹</span>
-                    <span>Включить камеру</span>
-                </button>
-            </div>
-            
-            <div class="control-group">
-                <label>&nbsp;</label>
-                <button class="btn btn-danger" onclick="stopVideo()" id="stopBtn" disabled>
-                    <span>⏹️</span>
-                    <span>Выключить камеру</span>
-                </button>
-            </div>
-        </div>
-        
-        <!-- Видео контейнер -->
-        <div class="video-container" id="videoContainer">
-            <!-- Локальное видео -->
-            <div class="video-box local">
-                <video id="localVideo" autoplay muted playsinline></video>
-                <div class="video-overlay">
-                    <div class="video-title">
-                        <span>Вы</span>
-                    </div>
-                    <div class="video-status">
-                        <span class="status-indicator status-offline" id="localStatus"></span>
-                        <span>Камера выключена</span>
-                    </div>
-                </div>
-            </div>
-            
-            <!-- Удаленное видео (появится когда подключится другой участник) -->
-            <div class="video-box remote" id="remoteVideoPlaceholder">
-                <div class="empty-state">
-                    <div class="empty-state-icon">👤</div>
-                    <h3>Ожидание участников</h3>
-                    <p>Подключитесь к комнате и пригласите других участников по тому же ID комнаты</p>
-                    <p style="margin-top: 10px; font-size: 14px; opacity: 0.7;">
-                        Как только кто-то подключится, здесь появится видео
-                    </p>
-                </div>
-            </div>
-        </div>
-        
-        <!-- Панель статистики -->
-        <div class="stats-bar">
-            <div class="stat-item">
-                <span>👥 Участников в комнате:</span>
-                <strong id="participantCount">0</strong>
-            </div>
-            <div class="stat-item">
-                <span>🌐 Статус соединения:</span>
-                <strong id="connectionStatus">Не подключено</strong>
-            </div>
-            <div class="stat-item">
-                <span>📹 Статус камеры:</span>
-                <strong id="cameraStatus">Выключена</strong>
-            </div>
-        </div>
-    </div>
+def compress_page(content: bytes) -> dict:
+    """Заранее сжать страницу и подготовить заголовки каждого варианта
     
-    <!-- Уведомления -->
-    <div class="notification" id="notification" style="display: none;"></div>
+    Байты вариантов различаются, поэтому у каждой кодировки свой ETag.
+    Сами ответы создаются на каждый запрос: FastAPI записывает в ответ
+    фоновые задачи запроса, поэтому делить один экземпляр нельзя.
+    """
+    digest = hashlib.sha256(content).hexdigest()[:16]
+    bodies = {}
+    # Порядок важен: сначала более плотное сжатие, несжатый вариант последний
+    if brotli is not None:
+        bodies["br"] = brotli.compress(content, quality=11)
+    bodies["gzip"] = gzip.compress(content, 9)
+    bodies["identity"] = content
+    
+    # кодировка -> (ETag, тело, заголовки)
+    variants = {}
+    for encoding, body in bodies.items():
+        etag = '"%s"' % digest if encoding == "identity" else '"%s-%s"' % (digest, encoding)
+        headers = {**PAGE_HEADERS, "ETag": etag, "Vary": "Accept-Encoding"}
+        if encoding != "identity":
+            headers["Content-Encoding"] = encoding
+        variants[encoding] = (etag, body, headers)
+    return variants
 
-    <!-- Основной скрипт -->
-    <script>
-        // ============================================
-        // КОНФИГУРАЦИЯ И ГЛОБАЛЬНЫЕ ПЕРЕМЕННЫЕ
-        // ============================================
-        const CONFIG = {
-            ICE_SERVERS: [
-                { urls: 'stun:stun.l.google.com:19302' },
-                { urls: 'stun:stun1.l.google.com:19302' },
-                { urls: 'stun:stun2.l.google.com:19302' },
-                { urls: 'stun:stun3.l.google.com:19302' },
-                { urls: 'stun:stun4.l.google.com:19302' }
-            ],
-            MEDIA_CONSTRAINTS: {
-                video: {
-                    width: { ideal: 1280, min: 640, max: 1920 },
-                    height: { ideal: 720, min: 480, max: 1080 },
-                    frameRate: { ideal: 30, min: 15, max: 60 },
-                    facingMode: "user"
-                },
-                audio: {
-                    echoCancellation: true,
-                    noiseSuppression: true,
-                    autoGainControl: true,
-                    channelCount: 2
-                }
-            }
-        };
-        
-        // Глобальные переменные
-        let ws = null;
-        let clientId = null;
-        let roomId = null;
-        let username = null;
-        let localStream = null;
-        let peerConnections = {};
-        let userNames = {};
-        let notificationTimeout = null;
-        
-        // DOM элементы
-        const connectBtn = document.getElementById('connectBtn');
-        const videoBtn = document.getElementById('videoBtn');
-        const stopBtn = document.getElementById('stopBtn');
-        const localVideo = document.getElementById('localVideo');
-        const localStatus = document.getElementById('localStatus');
-        const videoContainer = document.getElementById('videoContainer');
-        const remoteVideoPlaceholder = document.getElementById('remoteVideoPlaceholder');
-        const notification = document.getElementById('notification');
-        const participantCount = document.getElementById('participantCount');
-        const connectionStatus = document.getElementById('connectionStatus');
-        const cameraStatus = document.getElementById('cameraStatus');
-        
-        // ============================================
-        // УТИЛИТЫ И ВСПОМОГАТЕЛЬНЫЕ ФУНКЦИИ
-        // ============================================
-        
-        function showNotification(message, type = 'info', duration = 5000) {
-            // Скрываем предыдущее уведомление
-            if (notificationTimeout) {
-                clearTimeout(notificationTimeout);
-            }
-            
-            // Настраиваем уведомление
-            notification.textContent = message;
-            notification.className = 'notification';
-            
-            switch(type) {
-                case 'success':
-                    notification.classList.add('notification-success');
-                    break;
-                case 'error':
-                    notification.classList.add('notification-error');
-                    break;
-                case 'info':
-                    notification.classList.add('notification-info');
-                    break;
-            }
-            
-            // Показываем
-            notification.style.display = 'block';
-            
-            // Автоскрытие
-            notificationTimeout = setTimeout(() => {
-                notification.style.display = 'none';
-            }, duration);
-        }
-        
-        function hideNotification() {
-            if (notificationTimeout) {
-                clearTimeout(notificationTimeout);
-            }
-            notification.style.display = 'none';
-        }
-        
-        function updateParticipantCount() {
-            const count = Object.keys(peerConnections).length;
-            participantCount.textContent = count;
-        }
-        
-        function updateConnectionStatus(status, isConnected = false) {
-            connectionStatus.textContent = status;
-            connectionStatus.style.color = isConnected ? '#2ecc71' : '#e74c3c';
-        }
-        
-        function updateCameraStatus(status, isActive = false) {
-            cameraStatus.textContent = status;
-            cameraStatus.style.color = isActive ? '#2ecc71' : '#e74c3c';
-        }
-        
-        function updateLocalStatus(isActive) {
-            if (isActive) {
-                localStatus.className = 'status-indicator status-online';
-                updateCameraStatus('Включена', true);
-            } else {
-                localStatus.className = 'status-indicator status-offline';
-                updateCameraStatus('Выключена', false);
-            }
-        }
-        
-        // ============================================
-        // ПОДКЛЮЧЕНИЕ К КОМНАТЕ
-        // ============================================
-        
-        async function connectToRoom() {
-            // Получаем данные из формы
-            roomId = document.getElementById('roomId').value.trim() || 'комната1';
-            username = document.getElementById('username').value.trim() || 'Пользователь';
-            
-            // Генерируем уникальный ID клиента
-            clientId = 'user_' + Date.now() + '_' + Math.random().toString(36).substr(2, 9);
-            
-            // Обновляем UI
-            connectBtn.disabled = true;
-            connectBtn.innerHTML = '<span>🔄</span><span>Подключаемся...</span>';
-            showNotification('🔄 Подключаемся к серверу...', 'info');
-            updateConnectionStatus('Подключаемся...');
-            
-            try {
-                // Определяем URL для WebSocket
-                const protocol = window.location.protocol === 'https:' ? 'wss:' : 'ws:';
-                const hostname = window.location.hostname;
-                const port = window.location.port || (protocol === 'wss:' ? '8443' : '8000');
-                const wsUrl = `${protocol}//${hostname}:${port}/ws/${clientId}`;
-                
-                console.log('WebSocket URL:', wsUrl);
-                
-                // Создаем WebSocket соединение
-                ws = new WebSocket(wsUrl);
-                
-                // Обработчики WebSocket
-                ws.onopen = () => {
-                    console.log('✅ WebSocket подключен');
-                    showNotification('✅ Подключено к серверу', 'success');
-                    updateConnectionStatus('Подключено', true);
-                    
-                    // Отправляем запрос на присоединение к комнате
-                    ws.send(JSON.stringify({
-                        type: 'join',
-                        room: roomId,
-                        username: username
-                    }));
-                    
-                    // Обновляем кнопку
-                    connectBtn.innerHTML = '<span>✅</span><span>Подключено</span>';
-                    
-                    // Включаем кнопку камеры
-                    videoBtn.disabled = false;
-                };
-                
-                ws.onmessage = handleWebSocketMessage;
-                
-                ws.onclose = (event) => {
-                    console.log('📤 WebSocket отключен:', event.code, event.reason);
-                    showNotification('❌ Соединение с сервером потеряно', 'error');
-                    updateConnectionStatus('Отключено', false);
-                    resetConnection();
-                };
-                
-                ws.onerror = (error) => {
-                    console.error('❌ WebSocket ошибка:', error);
-                    showNotification('❌ Ошибка подключения к серверу', 'error');
-                    updateConnectionStatus('Ошибка', false);
-                    resetConnection();
-                };
-                
-            } catch (error) {
-                console.error('❌ Ошибка подключения:', error);
-                showNotification(`❌ Ошибка: ${error.message}`, 'error');
-                updateConnectionStatus('Ошибка', false);
-                resetConnection();
-            }
-        }
-        
-        // ============================================
-        // ОБРАБОТКА СООБЩЕНИЙ ОТ СЕРВЕРА
-        // ============================================
-        
-        function handleWebSocketMessage(event) {
-            try {
-                const data = JSON.parse(event.data);
-                console.log('📨 Получено от сервера:', data.type, data);
-                
-                switch(data.type) {
-                    case 'joined':
-                        handleJoined(data);
-                        break;
-                    case 'user_joined':
-                        handleUserJoined(data);
-                        break;
-                    case 'user_left':
-                        handleUserLeft(data);
-                        break;
-                    case 'offer':
-                        handleOffer(data);
-                        break;
-                    case 'answer':
-                        handleAnswer(data);
-                        break;
-                    case 'ice_candidate':
-                        handleIceCandidate(data);
-                        break;
-                    case 'error':
-                        showNotification(`❌ Ошибка: ${data.message}`, 'error');
-                        break;
-                    default:
-                        console.warn('Неизвестный тип сообщения:', data.type);
-                }
-            } catch (error) {
-                console.error('❌ Ошибка обработки сообщения:', error);
-            }
-        }
-        
-        function handleJoined(data) {
-            showNotification(`✅ Присоединились к комнате: ${data.room_id}`, 'success');
-            
-            // Сохраняем информацию о других участниках
-            if (data.participants && data.participants.length > 0) {
-                showNotification(`👥 В комнате уже есть участники: ${data.participants.map(p => p.username).join(', ')}`);
-                
-                // Создаем соединения с существующими участниками
-                data.participants.forEach(participant => {
-                    userNames[participant.client_id] = participant.username;
-                    createPeerConnection(participant.client_id);
-                });
-                
-                updateParticipantCount();
-            }
-        }
-        
-        function handleUserJoined(data) {
-            const userId = data.client_id;
-            const userName = data.username;
-            
-            // Сохраняем имя пользователя
-            userNames[userId] = userName;
-            
-            showNotification(`👋 ${userName} присоединился к комнате`, 'info');
-            
-            // Создаем peer connection
-            createPeerConnection(userId).then(pc => {
-                // Отправляем офер новому пользователю
-                if (localStream) {
-                    sendOffer(userId);
-                }
-            });
-            
-            updateParticipantCount();
-        }
-        
-        function handleUserLeft(data) {
-            const userId = data.client_id;
-            const userName = data.username || userNames[userId] || 'Участник';
-            
-            showNotification(`👋 ${userName} вышел из комнаты`, 'info');
-            
-            // Закрываем peer connection
-            if (peerConnections[userId]) {
-                peerConnections[userId].close();
-                delete peerConnections[userId];
-            }
-            
-            // Удаляем имя пользователя
-            delete userNames[userId];
-            
-            // Удаляем видео элемент
-            removeRemoteVideo(userId);
-            
-            updateParticipantCount();
-        }
-        
-        // ============================================
-        // РАБОТА С КАМЕРОЙ И МИКРОФОНОМ
-        // ============================================
-        
-        async function startVideo() {
-            try {
-                showNotification('🔄 Запрашиваю доступ к камере и микрофону...', 'info');
-                
-                // Запрашиваем доступ к медиаустройствам
-                localStream = await navigator.mediaDevices.getUserMedia(CONFIG.MEDIA_CONSTRAINTS);
-                
-                // Отображаем локальное видео
-                localVideo.srcObject = localStream;
-                updateLocalStatus(true);
-                
-                // Обновляем кнопки
-                videoBtn.disabled = true;
-                stopBtn.disabled = false;
-                
-                showNotification('✅ Камера и микрофон включены', 'success');
-                
-                // Отправляем оферы всем подключенным пользователям
-                for (const userId in peerConnections) {
-                    const pc = peerConnections[userId];
-                    if (pc) {
-                        // Добавляем локальные треки в существующее соединение
-                        localStream.getTracks().forEach(track => {
-                            try {
-                                pc.addTrack(track, localStream);
-                            } catch (e) {
-                                // Трек уже добавлен, создаем новое соединение
-                                console.log('Трек уже добавлен, создаем новое соединение');
-                                createPeerConnection(userId).then(newPc => {
-                                    sendOffer(userId);
-                                });
-                            }
-                        });
-                        
-                        // Отправляем офер
-                        await sendOffer(userId);
-                    }
-                }
-                
-            } catch (error) {
-                console.error('❌ Ошибка при включении камеры:', error);
-                handleCameraError(error);
-            }
-        }
-        
-        function handleCameraError(error) {
-            let message = '❌ Ошибка доступа к медиаустройствам: ';
-            
-            if (error.name === 'NotAllowedError') {
-                message += 'Доступ запрещен. Разрешите доступ к камере и микрофону в настройках браузера.';
-            } else if (error.name === 'NotFoundError') {
-                message += 'Камера или микрофон не найдены.';
-            } else if (error.name === 'NotReadableError') {
-                message += 'Не могу получить доступ к камере. Возможно, она уже используется другим приложением.';
-            } else if (error.name === 'OverconstrainedError') {
-                message += 'Запрошенные настройки камеры не поддерживаются.';
-            } else {
-                message += error.message;
-            }
-            
-            showNotification(message, 'error');
-            updateLocalStatus(false);
-            
-            // Включаем кнопку повторно
-            videoBtn.disabled = false;
-            stopBtn.disabled = true;
-        }
-        
-        function stopVideo() {
-            if (localStream) {
-                // Останавливаем все треки
-                localStream.getTracks().forEach(track => {
-                    track.stop();
-                });
-                localStream = null;
-                
-                // Очищаем видео элемент
-                localVideo.srcObject = null;
-                updateLocalStatus(false);
-                
-                // Закрываем все peer connections
-                for (const userId in peerConnections) {
-                    peerConnections[userId].close();
-                }
-                peerConnections = {};
-                
-                // Удаляем все удаленные видео
-                removeAllRemoteVideos();
-                
-                // Обновляем кнопки
-                videoBtn.disabled = false;
-                stopBtn.disabled = true;
-                
-                showNotification('Камера и микрофон выключены', 'info');
-            }
-        }
-        
-        // ============================================
-        // WEBRTC: PEER CONNECTION
-        // ============================================
-        
-        async function createPeerConnection(userId) {
-            // Если соединение уже существует, возвращаем его
-            if (peerConnections[userId]) {
-                console.log(`✅ Соединение с ${userId} уже существует`);
-                return peerConnections[userId];
-            }
-            
-            console.log(`🔗 Создаю новое соединение с ${userId}`);
-            
-            // Создаем новый RTCPeerConnection
-            const pc = new RTCPeerConnection({
-                iceServers: CONFIG.ICE_SERVERS,
-                iceTransportPolicy: 'all',
-                bundlePolicy: 'max-bundle',
-                rtcpMuxPolicy: 'require'
-            });
-            
-            peerConnections[userId] = pc;
-            
-            // Добавляем локальные треки если камера включена
-            if (localStream) {
-                localStream.getTracks().forEach(track => {
-                    try {
-                        pc.addTrack(track, localStream);
-                    } catch (e) {
-                        console.log('Трек уже добавлен в это соединение');
-                    }
-                });
-            }
-            
-            // Обработка ICE кандидатов
-            pc.onicecandidate = (event) => {
-                if (event.candidate && ws && ws.readyState === WebSocket.OPEN) {
-                    ws.send(JSON.stringify({
-                        type: 'ice_candidate',
-                        target: userId,
-                        candidate: event.candidate
-                    }));
-                }
-            };
-            
-            // Обработка изменения состояния ICE соединения
-            pc.oniceconnectionstatechange = () => {
-                console.log(`ICE состояние для ${userId}:`, pc.iceConnectionState);
-                
-                if (pc.iceConnectionState === 'failed' || pc.iceConnectionState === 'disconnected') {
-                    console.log(`Перезапускаю ICE для ${userId}`);
-                    pc.restartIce();
-                }
-            };
-            
-            // Обработка удаленного потока
-            pc.ontrack = (event) => {
-                console.log(`🎬 Получен поток от ${userId}`);
-                const stream = event.streams[0];
-                
-                // Создаем или обновляем видео элемент
-                createRemoteVideoElement(userId, stream);
-                
-                // Показываем уведомление
-                const userName = userNames[userId] || 'Участник';
-                showNotification(`✅ Видео от ${userName} получено`, 'success');
-            };
-            
-            return pc;
-        }
-        
-        // ============================================
-        // WEBRTC: ОБРАБОТКА ОФЕРОВ И ОТВЕТОВ
-        // ============================================
-        
-        async function sendOffer(userId) {
-            const pc = peerConnections[userId];
-            if (!pc) {
-                console.error(`❌ Нет соединения для отправки офера ${userId}`);
-                return;
-            }
-            
-            try {
-                console.log(`📤 Создаю офер для ${userId}`);
-                
-                const offerOptions = {
-                    offerToReceiveAudio: true,
-                    offerToReceiveVideo: true,
-                    voiceActivityDetection: false
-                };
-                
-                const offer = await pc.createOffer(offerOptions);
-                await pc.setLocalDescription(offer);
-                
-                if (ws && ws.readyState === WebSocket.OPEN) {
-                    ws.send(JSON.stringify({
-                        type: 'offer',
-                        target: userId,
-                        offer: {
-                            sdp: pc.localDescription.sdp,
-                            type: pc.localDescription.type
-                        }
-                    }));
-                    
-                    console.log(`✅ Офер отправлен ${userId}`);
-                }
-            } catch (error) {
-                console.error(`❌ Ошибка создания/отправки офера для ${userId}:`, error);
-            }
-        }
-        
-        async function handleOffer(data) {
-            const userId = data.sender;
-            console.log(`📥 Получен офер от ${userId}`);
-            
-            // Создаем или получаем существующее соединение
-            const pc = await createPeerConnection(userId);
-            
-            try {
-                await pc.setRemoteDescription(new RTCSessionDescription(data.offer));
-                
-                const answerOptions = {
-                    voiceActivityDetection: false
-                };
-                
-                const answer = await pc.createAnswer(answerOptions);
-                await pc.setLocalDescription(answer);
-                
-                if (ws && ws.readyState === WebSocket.OPEN) {
-                    ws.send(JSON.stringify({
-                        type: 'answer',
-                        target: userId,
-                        answer: {
-                            sdp: pc.localDescription.sdp,
-                            type: pc.localDescription.type
-                        }
-                    }));
-                    
-                    console.log(`✅ Ответ отправлен ${userId}`);
-                }
-            } catch (error) {
-                console.error(`❌ Ошибка обработки офера от ${userId}:`, error);
-            }
-        }
-        
-        async function handleAnswer(data) {
-            const userId = data.sender;
-            const pc = peerConnections[userId];
-            
-            if (pc) {
-                try {
-                    await pc.setRemoteDescription(new RTCSessionDescription(data.answer));
-                    console.log(`✅ Ответ от ${userId} установлен`);
-                } catch (error) {
-                    console.error(`❌ Ошибка установки ответа от ${userId}:`, error);
-                }
-            }
-        }
-        
-        async function handleIceCandidate(data) {
-            const userId = data.sender;
-            const pc = peerConnections[userId];
-            
-            if (pc && data.candidate) {
-                try {
-                    await pc.addIceCandidate(new RTCIceCandidate(data.candidate));
-                    console.log(`✅ ICE кандидат от ${userId} добавлен`);
-                } catch (error) {
-                    console.error(`❌ Ошибка добавления ICE кандидата от ${userId}:`, error);
-                }
-            }
-        }
-        
-        // ============================================
-        // УПРАВЛЕНИЕ ВИДЕО ЭЛЕМЕНТАМИ
-        // ============================================
-        
-        function createRemoteVideoElement(userId, stream) {
-            // Убираем placeholder
-            remoteVideoPlaceholder.style.display = 'none';
-            
-            // Удаляем существующее видео если есть
-            removeRemoteVideo(userId);
-            
-            // Создаем новый контейнер для видео
-            const videoBox = document.createElement('div');
-            videoBox.className = 'video-box remote';
-            videoBox.id = `remote_${userId}`;
-            
-            // Создаем video элемент
-            const video = document.createElement('video');
-            video.id = `remoteVideo_${userId}`;
-            video.autoplay = true;
-            video.playsInline = true;
-            video.srcObject = stream;
-            
-            // Создаем оверлей с информацией
-            const overlay = document.createElement('div');
-            overlay.className = 'video-overlay';
-            
-            const title = document.createElement('div');
-            title.className = 'video-title';
-            
-            const userName = userNames[userId] || 'Участник';
-            title.innerHTML = `
-                <span>${userName}</span>
-                <span class="status-indicator status-online"></span>
-            `;
-            
-            const status = document.createElement('div');
-            status.className = 'video-status';
-            status.textContent = 'Включено';
-            
-            overlay.appendChild(title);
-            overlay.appendChild(status);
-            videoBox.appendChild(video);
-            videoBox.appendChild(overlay);
-            
-            // Добавляем в контейнер
-            videoContainer.appendChild(videoBox);
-            
-            console.log(`✅ Видео элемент для ${userId} создан`);
-        }
-        
-        function removeRemoteVideo(userId) {
-            const videoElement = document.getElementById(`remote_${userId}`);
-            if (videoElement) {
-                videoElement.remove();
-                console.log(`🗑️ Видео элемент ${userId} удален`);
-            }
-            
-            // Если больше нет удаленных видео, показываем placeholder
-            const remoteVideos = document.querySelectorAll('.remote.video-box');
-            if (remoteVideos.length === 0) {
-                remoteVideoPlaceholder.style.display = 'block';
-            }
-        }
-        
-        function removeAllRemoteVideos() {
-            // Удаляем все удаленные видео элементы
-            document.querySelectorAll('.remote.video-box').forEach(el => {
-                if (el.id !== 'remoteVideoPlaceholder') {
-                    el.remove();
-                }
-            });
-            
-            // Показываем placeholder
-            remoteVideoPlaceholder.style.display = 'block';
-        }
-        
-        // ============================================
-        // СБРОС СОЕДИНЕНИЯ И ОЧИСТКА
-        // ============================================
-        
-        function resetConnection() {
-            // Закрываем WebSocket
-            if (ws) {
-                ws.close();
-                ws = null;
-            }
-            
-            // Выключаем камеру
-            stopVideo();
-            
-            // Очищаем peer connections
-            peerConnections = {};
-            userNames = {};
-            
-            // Удаляем все удаленные видео
-            removeAllRemoteVideos();
-            
-            // Сбрасываем кнопки
-            connectBtn.disabled = false;
-            connectBtn.innerHTML = '<span>🔗</span><span>Подключиться к комнате</span>';
-            videoBtn.disabled = true;
-            stopBtn.disabled = true;
-            
-            // Сбрасываем статусы
-            updateConnectionStatus('Не подключено', false);
-            updateParticipantCount();
-        }
-        
-        // ============================================
-        // ИНИЦИАЛИЗАЦИЯ И ОБРАБОТЧИКИ СОБЫТИЙ
-        // ============================================
-        
-        function initializeEventHandlers() {
-            // Обработка нажатия Enter в полях ввода
-            document.getElementById('roomId').addEventListener('keypress', (e) => {
-                if (e.key === 'Enter') connectToRoom();
-            });
-            
-            document.getElementById('username').addEventListener('keypress', (e) => {
-                if (e.key === 'Enter') connectToRoom();
-            });
-            
-            // Очистка при закрытии страницы
-            window.addEventListener('beforeunload', () => {
-                if (ws) {
-                    ws.close();
-                }
-                if (localStream) {
-                    localStream.getTracks().forEach(track => track.stop());
-                }
-            });
-            
-            // Периодическая проверка соединения
-            setInterval(() => {
-                if (ws && ws.readyState === WebSocket.OPEN) {
-                    ws.send(JSON.stringify({ type: 'ping' }));
-                }
-            }, 30000);
-        }
-        
-        // ============================================
-        // ЗАГРУЗКА СТРАНИЦЫ
-        // ============================================
-        
-        window.addEventListener('load', () => {
-            console.log('🚀 Страница видеозвонка загружена');
-            initializeEventHandlers();
-            showNotification('✅ Страница готова к работе', 'success');
-            
-            // Автоматически показываем информацию о подключении
-            setTimeout(() => {
-                if (window.location.hostname !== 'localhost' && window.location.hostname !== '127.0.0.1') {
-                    showNotification(`📱 Для подключения с других устройств откройте этот же адрес на другом устройстве`, 'info', 10000);
-                }
-            }, 2000);
-        });
-    </script>
-</body>
-</html>
+def load_page(name: str) -> dict:
+    """Прочитать страницу из static и подготовить ее к отдаче"""
+    with open(os.path.join(STATIC_DIR, name), "rb") as f:
+        content = f.read()
+    # Подставляем версии стилей и скриптов, чтобы их можно было кэшировать навсегда
+    for asset in ("chat.css", "chat.js"):
+        content = content.replace(f'"/static/{asset}"'.encode(), f'"{asset_url(asset)}"'.encode())
+    return compress_page(content)
+
+@functools.lru_cache(maxsize=64)
+def choose_encoding(accept: str, available: tuple) -> str:
+    """Выбрать кодировку по Accept-Encoding с учетом q-значений
+    
+    Из сжатых вариантов берется разрешенный (q > 0) с наибольшим q, при равенстве -
+    более плотный. Если ни один не подошел, отдается несжатая страница.
+    Браузеры шлют несколько разных заголовков, поэтому результат кэшируется.
     """
-    return HTMLResponse(content=html_content)
+    weights = {}
+    for item in accept.split(","):
+        name, _, params = item.partition(";")
+        name = name.strip().lower()
+        if not name:
+            continue
+        q = 1.0
+        for param in params.split(";"):
+            key, _, value = param.partition("=")
+            if key.strip().lower() == "q":
+                try:
+                    q = float(value)
+                except ValueError:
+                    q = 0.0
+        weights[name] = q
+    
+    default = weights.get("*", 0.0)
+    best, best_q = "identity", 0.0
+    for encoding in available:
+        if encoding == "identity":
+            continue
+        q = weights.get(encoding, default)
+        if q > best_q:
+            best, best_q = encoding, q
+    return best
+
+def etag_matches(if_none_match: str, etag: str) -> bool:
+    """Проверить If-None-Match: список меток через запятую, W/ не учитывается"""
+    for tag in if_none_match.split(","):
+        tag = tag.strip()
+        if tag.startswith("W/"):
+            tag = tag[2:]
+        if tag == etag or tag == "*":
+            return True
+    return False
+
+def page_response(page: dict, request: Request) -> Response:
+    """Отдать лучший вариант страницы, который принимает браузер"""
+    headers = request.headers
+    encoding = choose_encoding(headers.get("accept-encoding", ""), tuple(page))
+    etag, body, page_headers = page[encoding]
+    # Этот вариант у браузера уже есть - тело не отправляем
+    if_none_match = headers.get("if-none-match")
+    if if_none_match and etag_matches(if_none_match, etag):
+        return Response(status_code=304, headers=page_headers)
+    return HTMLResponse(body, headers=page_headers)
+
+HOME_PAGE = compress_page(HOME_HTML)
+CHAT_PAGE = load_page("chat.html")
+
+@app.get("/")
+async def home(request: Request):
+    return page_response(HOME_PAGE, request)
+
+@app.get("/chat")
+async def chat_page(request: Request):
+    return page_response(CHAT_PAGE, request)
 
 @app.websocket("/ws/{client_id}")
 async def websocket_endpoint(websocket: WebSocket, client_id: str):
     """WebSocket endpoint для обработки соединений"""
+    # ID клиента - UUID из 36 символов; остальное отклоняем до регистрации
+    if len(client_id) != 36:
+        await websocket.close(code=1008)
+        return
+    
     # Подключаем клиента
     success = await manager.connect(websocket, client_id)
     if not success:
         return
     
+    # Локальные ссылки избавляют цикл от поиска атрибутов на каждом сообщении
+    receive = websocket.receive
+    loads = orjson.loads
+    get_handler = HANDLERS.get
+    
     try:
         while True:
-            # Ждем сообщение от клиента
-            data = await websocket.receive_json()
-            await handle_websocket_message(client_id, data)
-            
+            # Ждем сообщение от клиента: сырое ASGI событие без оберток receive_json
+            message = await receive()
+            if message["type"] == "websocket.disconnect":
+                break
+            
+            raw = message.get("bytes")
+            if raw is None:
+                raw = message["text"]
+                # Лимит задан в байтах, а длина текста - в символах (до 4 байт UTF-8
+                # каждый): кодируем только текст, который может превысить лимит
+                if len(raw) * 4 > MAX_MESSAGE_SIZE:
+                    raw = raw.encode()
+            # Слишком большой фрейм отклоняем до разбора JSON
+            if len(raw) > MAX_MESSAGE_SIZE:
+                logger.warning("🚫 Клиент %s прислал %d байт, закрываем соединение", client_id, len(raw))
+                await websocket.close(code=1009)
+                break
+            data = loads(raw)
+            
+            # Один поиск в словаре вместо цепочки сравнений строк
+            handler = get_handler(data.get("type"))
+            if handler is not None:
+                await handler(client_id, data)
+    
     except WebSocketDisconnect:
-        await handle_client_disconnect(client_id)
+        pass
     except Exception as e:
-        logger.error(f"❌ Ошибка с клиентом {client_id}: {str(e)}")
+        logger.error("❌ Ошибка с клиентом %s: %s", client_id, e)
+    finally:
+        # Клиент удаляется при любом выходе из цикла, иначе его записи останутся навсегда
         await handle_client_disconnect(client_id)
 
-async def handle_websocket_message(client_id: str, data: dict):
-    """Обработка входящих WebSocket сообщений"""
-    message_type = data.get("type")
-    
-    if message_type == "join":
-        await handle_join(client_id, data)
-    
-    elif message_type == "offer":
-        await handle_offer(client_id, data)
-    
-    elif message_type == "answer":
-        await handle_answer(client_id, data)
-    
-    elif message_type == "ice_candidate":
-        await handle_ice_candidate(client_id, data)
-    
-    elif message_type == "chat":
-        await handle_chat(client_id, data)
-    
-    elif message_type == "ping":
-        await handle_ping(client_id)
-
 async def handle_join(client_id: str, data: dict):
     """Обработка присоединения к комнате"""
     room_id = data.get("room", "default")
     username = data.get("username", "Anonymous")
     
-    logger.info(f"👤 {username} пытается присоединиться к комнате {room_id}")
-    
-    # Получаем существующих участников ДО добавления нового
-    existing_users = []
-    if room_id in manager.rooms:
-        existing_users = manager.rooms[room_id].copy()
+    logger.debug("👤 %s пытается присоединиться к комнате %s", username, room_id)
     
     # Добавляем нового пользователя в комнату
     other_users = await manager.join_room(client_id, room_id, username)
@@ -1450,29 +431,36 @@ async def handle_join(client_id: str, data: dict):
         "client_id": client_id,
         "username": username,
         "participants": other_users,
-        "timestamp": datetime.now().isoformat()
+        "timestamp": _TS[0]
     }, client_id)
     
-    logger.info(f"✅ {username} присоединился к комнате {room_id}. Участников: {len(existing_users) + 1}")
+    logger.debug("✅ %s присоединился к комнате %s. Участников: %d", username, room_id, len(manager.rooms[room_id]))
     
     # 2. Уведомляем существующих участников о новом пользователе
-    for existing_user in other_users:
-        await manager.send_to_client({
+    # (сообщение одинаково для всех, поэтому сериализуется один раз)
+    if other_users:
+        await manager.broadcast_to_room({
             "type": "user_joined",
             "client_id": client_id,
             "username": username,
-            "timestamp": datetime.now().isoformat(),
+            "timestamp": _TS[0],
             "should_initiate": True  # Существующие участники инициируют соединение
-        }, existing_user["client_id"])
-        
-        # 3. Уведомляем нового пользователя о существующих участниках
-        await manager.send_to_client({
-            "type": "user_joined",
-            "client_id": existing_user["client_id"],
-            "username": existing_user["username"],
-            "timestamp": datetime.now().isoformat(),
-            "should_initiate": False  # Новый пользователь будет отвечать на оферы
-        }, client_id)
+        }, room_id, exclude_client=client_id)
+    
+    # Соединения с существующими участниками новый пользователь создает
+    # по списку participants из joined и отвечает на их оферы
+
+# Шаблоны пересылаемых сообщений: форма постоянная, подставляются только
+# значения (отправитель и тело сериализует orjson, время - готовые байты)
+OFFER_TEMPLATE = b'{"type":"offer","sender":%s,"offer":%s,"timestamp":"%s"}'
+ANSWER_TEMPLATE = b'{"type":"answer","sender":%s,"answer":%s,"timestamp":"%s"}'
+ICE_TEMPLATE = b'{"type":"ice_candidate","sender":%s,"candidate":%s,"timestamp":"%s"}'
+ICE_BATCH_TEMPLATE = b'{"type":"ice_candidates","sender":%s,"candidates":[%s],"timestamp":"%s"}'
+CHAT_TEMPLATE = b'{"type":"chat","sender":%s,"message":%s,"timestamp":"%s"}'
+
+def relay_envelope(template: bytes, sender: str, body) -> bytes:
+    """Собрать пересылаемое сообщение по шаблону без промежуточного словаря"""
+    return template % (orjson.dumps(sender), orjson.dumps(body), _TS[1])
 
 async def handle_offer(client_id: str, data: dict):
     """Обработка WebRTC офера"""
@@ -1480,14 +468,9 @@ async def handle_offer(client_id: str, data: dict):
     offer = data.get("offer")
     
     if target_client_id and offer:
-        logger.info(f"📤 {client_id} отправляет офер {target_client_id}")
+        logger.debug("📤 %s отправляет офер %s", client_id, target_client_id)
         
-        await manager.send_to_client({
-            "type": "offer",
-            "sender": client_id,
-            "offer": offer,
-            "timestamp": datetime.now().isoformat()
-        }, target_client_id)
+        await manager.send_payload(relay_envelope(OFFER_TEMPLATE, client_id, offer), target_client_id)
 
 async def handle_answer(client_id: str, data: dict):
     """Обработка WebRTC ответа"""
@@ -1495,27 +478,150 @@ async def handle_answer(client_id: str, data: dict):
     answer = data.get("answer")
     
     if target_client_id and answer:
-        logger.info(f"📥 {client_id} отправляет ответ {target_client_id}")
+        logger.debug("📥 %s отправляет ответ %s", client_id, target_client_id)
         
-        await manager.send_to_client({
-            "type": "answer",
-            "sender": client_id,
-            "answer": answer,
-            "timestamp": datetime.now().isoformat()
-        }, target_client_id)
+        await manager.send_payload(relay_envelope(ANSWER_TEMPLATE, client_id, answer), target_client_id)
 
-async def handle_ice_candidate(client_id: str, data: dict):
-    """Обработка ICE кандидата"""
-    target_client_id = data.get("target")
-    candidate = data.get("candidate")
+# Окно, за которое кандидаты от одного отправителя одному получателю
+# собираются в одно сообщение ice_candidates, секунд
+ICE_BATCH_WINDOW = 0.02
+
+# Ограничение потока кандидатов на пару (отправитель, получатель):
+# в среднем ICE_RATE в секунду, всплеском - не больше ICE_BURST
+ICE_RATE = 50.0
+ICE_BURST = 50.0
+# Общее ограничение отправителя по всем получателям: хватает на кандидаты
+# ко всей комнате, но смена target не дает обойти лимит пары
+ICE_SENDER_RATE = 500.0
+ICE_SENDER_BURST = 500.0
+# Сколько корзин пар держит один отправитель (получатели на других воркерах
+# не проверяются локально, их корзины забываются только при простое)
+ICE_MAX_TARGETS = 256
+
+def take_token(bucket, now: float, rate: float, burst: float) -> float:
+    """Остаток токенов после одного кандидата; меньше нуля - кандидат лишний"""
+    if bucket is None:
+        return burst - 1
+    tokens, last = bucket
+    return min(burst, tokens + (now - last) * rate) - 1
+
+def make_ice_handler(manager: ConnectionManager):
+    """Собрать обработчик ICE кандидатов - самого частого сообщения
     
-    if target_client_id and candidate:
-        await manager.send_to_client({
-            "type": "ice_candidate",
-            "sender": client_id,
-            "candidate": candidate,
-            "timestamp": datetime.now().isoformat()
-        }, target_client_id)
+    Ссылки на словарь клиентов, очередь и сериализатор привязываются один раз.
+    Кандидаты принимаются только для участника общей комнаты, проходят через
+    корзины токенов отправителя (ICE_SENDER_RATE в секунду) и пары
+    (ICE_RATE в секунду) и копятся ICE_BATCH_WINDOW секунд, затем уходят
+    одним сообщением. Возвращает обработчик и функцию, которая забывает
+    корзины отключившегося клиента.
+    """
+    get_client = manager.clients.get
+    put = manager._put
+    send_payload = manager.send_payload
+    dumps = orjson.dumps
+    ts = _TS
+    # (отправитель, получатель) -> сериализованные кандидаты
+    buffers = {}
+    # отправитель -> {получатель: (токены, время последнего кандидата)}
+    buckets = {}
+    # отправитель -> (токены, время последнего кандидата) по всем получателям
+    totals = {}
+    # получатель -> отправители, у которых есть его корзина
+    senders_of = {}
+    background = set()
+    
+    def flush(key):
+        """Отправить накопленные кандидаты получателю"""
+        candidates = buffers.pop(key)
+        sender, target_client_id = key
+        if len(candidates) == 1:
+            payload = ICE_TEMPLATE % (dumps(sender), candidates[0], ts[1])
+        else:
+            payload = ICE_BATCH_TEMPLATE % (dumps(sender), b",".join(candidates), ts[1])
+        client = get_client(target_client_id)
+        if client is not None:
+            put(client, payload)
+        elif manager.backplane is not None:
+            # Получатель на другом воркере
+            task = asyncio.create_task(send_payload(payload, target_client_id))
+            background.add(task)
+            task.add_done_callback(background.discard)
+    
+    def forget_pair(sender: str, target_client_id: str):
+        """Убрать отправителя из обратного индекса получателя"""
+        senders = senders_of.get(target_client_id)
+        if senders is not None:
+            senders.discard(sender)
+            if not senders:
+                del senders_of[target_client_id]
+    
+    async def handle_ice_candidate(client_id: str, data: dict):
+        """Обработка ICE кандидата"""
+        target_client_id = data.get("target")
+        candidate = data.get("candidate")
+        if not (target_client_id and candidate):
+            return
+        
+        key = (client_id, target_client_id)
+        loop = asyncio.get_running_loop()
+        now = loop.time()
+        
+        # Кандидат имеет смысл только для участника общей комнаты: иначе
+        # выдуманные target обходили бы лимит пары и копили корзины
+        sender = get_client(client_id)
+        target = get_client(target_client_id)
+        if target is not None:
+            if sender is None or target.rooms.isdisjoint(sender.rooms):
+                logger.debug("🚦 Кандидат %s -> %s отброшен: нет общей комнаты", client_id, target_client_id)
+                return
+        elif manager.backplane is None:
+            # Получатель не подключен ни к одному воркеру
+            return
+        
+        # Корзины токенов: лишние кандидаты (флуд, зацикленный restartIce) отбрасываем
+        sender_buckets = buckets.get(client_id)
+        if sender_buckets is None:
+            sender_buckets = buckets[client_id] = {}
+        total = take_token(totals.get(client_id), now, ICE_SENDER_RATE, ICE_SENDER_BURST)
+        bucket = sender_buckets.get(target_client_id)
+        tokens = take_token(bucket, now, ICE_RATE, ICE_BURST)
+        if tokens < 0 or total < 0:
+            logger.debug("🚦 Кандидат %s -> %s отброшен: превышен лимит", client_id, target_client_id)
+            return
+        if bucket is None and len(sender_buckets) >= ICE_MAX_TARGETS:
+            # Простаивавшая корзина уже снова полная - удалить ее без потерь
+            idle = [t for t, (_, last) in sender_buckets.items() if now - last >= ICE_BURST / ICE_RATE]
+            if not idle:
+                logger.debug("🚦 Кандидат %s -> %s отброшен: слишком много получателей", client_id, target_client_id)
+                return
+            for stale in idle:
+                del sender_buckets[stale]
+                forget_pair(client_id, stale)
+        totals[client_id] = (total, now)
+        sender_buckets[target_client_id] = (tokens, now)
+        if bucket is None:
+            senders_of.setdefault(target_client_id, set()).add(client_id)
+        
+        pending = buffers.get(key)
+        if pending is None:
+            buffers[key] = [dumps(candidate)]
+            loop.call_later(ICE_BATCH_WINDOW, flush, key)
+        else:
+            pending.append(dumps(candidate))
+    
+    def forget_client(client_id: str):
+        """Удалить корзины отключившегося клиента - и как отправителя, и как получателя"""
+        totals.pop(client_id, None)
+        for target_client_id in buckets.pop(client_id, ()):
+            forget_pair(client_id, target_client_id)
+        for sender in senders_of.pop(client_id, ()):
+            sender_buckets = buckets.get(sender)
+            if sender_buckets is not None:
+                sender_buckets.pop(client_id, None)
+    
+    return handle_ice_candidate, forget_client
+
+handle_ice_candidate, forget_ice_client = make_ice_handler(manager)
 
 async def handle_chat(client_id: str, data: dict):
     """Обработка сообщений чата"""
@@ -1528,22 +634,18 @@ async def handle_chat(client_id: str, data: dict):
         username = user_info.get("username", "Unknown")
         
         # Отправляем сообщение всем в комнате, кроме отправителя
-        if room_id in manager.rooms:
-            for user_id in manager.rooms[room_id]:
-                if user_id != client_id:
-                    await manager.send_to_client({
-                        "type": "chat",
-                        "sender": username,
-                        "message": message,
-                        "timestamp": datetime.now().isoformat()
-                    }, user_id)
+        # (кадр собирается из кусков байтов и дойдет до других воркеров)
+        await manager.broadcast_raw(relay_envelope(CHAT_TEMPLATE, username, message),
+                                    room_id, exclude_client=client_id)
 
-async def handle_ping(client_id: str):
-    """Обработка ping-сообщений для поддержания соединения"""
-    await manager.send_to_client({
-        "type": "pong",
-        "timestamp": datetime.now().isoformat()
-    }, client_id)
+# Обработчики входящих сообщений по их типу
+HANDLERS = {
+    "join": handle_join,
+    "offer": handle_offer,
+    "answer": handle_answer,
+    "ice_candidate": handle_ice_candidate,
+    "chat": handle_chat,
+}
 
 async def handle_client_disconnect(client_id: str):
     """Обработка отключения клиента"""
@@ -1552,58 +654,106 @@ async def handle_client_disconnect(client_id: str):
     room_id = user_info.get("room_id")
     username = user_info.get("username", "Unknown")
     
-    logger.info(f"📤 {username} отключается")
+    logger.debug("📤 %s отключается", username)
     
     # Отключаем пользователя
     manager.disconnect(client_id)
+    forget_ice_client(client_id)
     
-    # Уведомляем других участников комнаты
-    if room_id and room_id in manager.rooms:
-        for user_id in manager.rooms[room_id]:
-            if user_id != client_id and user_id in manager.active_connections:
-                await manager.send_to_client({
-                    "type": "user_left",
-                    "client_id": client_id,
-                    "username": username,
-                    "timestamp": datetime.now().isoformat()
-                }, user_id)
+    # Уведомляем других участников комнаты (в том числе на других воркерах)
+    if room_id:
+        await manager.broadcast_to_room({
+            "type": "user_left",
+            "client_id": client_id,
+            "username": username,
+            "timestamp": _TS[0]
+        }, room_id, exclude_client=client_id)
+
+# Время жизни кэша /stats, секунд; кэш - [момент расчета, тело ответа]
+STATS_CACHE_TTL = 1.0
+_stats_cache = [float("-inf"), None]
+
+# Кросс-доменный доступ нужен только JSON эндпоинтам мониторинга:
+# страницы и WebSocket открываются с того же адреса
+MONITORING_HEADERS = {"Access-Control-Allow-Origin": "*"}
 
+# Эндпоинты мониторинга сами собирают ответ: словарь не проходит через
+# jsonable_encoder FastAPI, и datetime в ISO формат переводит orjson
 @app.get("/health")
 async def health_check():
     """Проверка здоровья сервера"""
-    return {
+    return ORJSONResponse({
         "status": "healthy",
         "server_ip": LOCAL_IP,
-        "clients": len(manager.active_connections),
+        "clients": len(manager.clients),
         "rooms": len(manager.rooms),
-        "timestamp": datetime.now().isoformat(),
+        "timestamp": datetime.now(),
         "version": "1.0.0"
-    }
+    }, headers=MONITORING_HEADERS)
 
 @app.get("/stats")
 async def get_stats():
     """Получение статистики сервера"""
+    # Мониторинг опрашивает эндпоинт часто: статистика пересчитывается
+    # и сериализуется не чаще STATS_CACHE_TTL
+    now = time.monotonic()
+    if now - _stats_cache[0] < STATS_CACHE_TTL:
+        return Response(_stats_cache[1], media_type="application/json", headers=MONITORING_HEADERS)
+    
+    user_info = manager.user_info
     room_stats = {}
     for room_id, users in manager.rooms.items():
+        # Один проход по комнате: ID и имена собираются вместе
+        uid_list = []
+        names = []
+        for uid in users:
+            uid_list.append(uid)
+            names.append(user_info.get(uid, {}).get("username", "Unknown"))
         room_stats[room_id] = {
-            "users": users,
-            "count": len(users),
-            "usernames": [manager.user_info.get(uid, {}).get("username", "Unknown") for uid in users]
+            "users": uid_list,
+            "count": len(uid_list),
+            "usernames": names
         }
     
-    return {
-        "total_clients": len(manager.active_connections),
+    stats = {
+        "total_clients": len(manager.clients),
         "total_rooms": len(manager.rooms),
         "rooms": room_stats,
-        "server_started": datetime.now().isoformat()
+        "server_started": datetime.now()
     }
+    body = orjson.dumps(stats)
+    _stats_cache[0], _stats_cache[1] = now, body
+    return Response(body, media_type="application/json", headers=MONITORING_HEADERS)
 
-@app.get("/admin")
-
-    
 if __name__ == "__main__":
     import os
-    import ssl
+    import sys
+    
+    # uvloop и httptools - C-реализации цикла событий и HTTP парсера.
+    # uvloop не поддерживает Windows, там остается стандартный asyncio.
+    # Состояние комнат хранится в процессе: несколько воркеров видят друг друга
+    # только через Redis. С шиной по умолчанию воркер на каждое ядро
+    # (сокет открывает супервизор uvicorn, воркеры его наследуют), без нее - один воркер.
+    default_workers = (os.cpu_count() or 1) if REDIS_URL else 1
+    workers = int(os.getenv("WEB_CONCURRENCY", str(default_workers)))
+    if workers > 1 and not REDIS_URL:
+        print("⚠️ WEB_CONCURRENCY > 1 требует BACKPLANE_URL или REDIS_URL, запускаем один воркер")
+        workers = 1
+    
+    server_options = {
+        "host": "0.0.0.0",
+        "loop": "asyncio" if sys.platform == "win32" else "uvloop",
+        "http": "httptools",
+        "ws": "websockets",
+        # Сжатие тратит CPU на каждый фрейм, а почти весь трафик - мелкие ICE
+        # кандидаты, поэтому по умолчанию оно выключено (WS_DEFLATE=1 включает).
+        # Фреймы больше MAX_MESSAGE_SIZE сервер отклоняет сам.
+        # TCP_NODELAY asyncio и uvloop включают сами.
+        "ws_per_message_deflate": os.getenv("WS_DEFLATE", "0") == "1",
+        "ws_max_size": MAX_MESSAGE_SIZE,
+        "workers": workers,
+        "log_level": "warning",
+    }
     
     print("=" * 70)
     print("🎥 ВИДЕОЧАТ HTTPS - КАМЕРА БУДЕТ РАБОТАТЬ!")
@@ -1627,12 +777,11 @@ if __name__ == "__main__":
         print("=" * 70)
         
         uvicorn.run(
-            app,
-            host="0.0.0.0",
+            "video_server:app",
             port=8443,
             ssl_keyfile="localhost.key",
             ssl_certfile="localhost.crt",
-            log_level="info"
+            **server_options
         )
     else:
         print("❌ SSL сертификаты не найдены!")
@@ -1647,8 +796,7 @@ if __name__ == "__main__":
         print("=" * 70)
         
         uvicorn.run(
-            app,
-            host="0.0.0.0",
+            "video_server:app",
             port=8000,
-            log_level="info"
+            **server_options
         )